@@ -9,14 +9,28 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 
+from core.coalesce import ai_requests
 from core.config import config
+from core.context import context_builder
+from core.features import team_features
+from core.ingest import ingestion
+from core.ratings import ratings
+from core.response_cache import response_cache
+from core.routes import router
+from core.schedule_cache import schedule_cache
+from core.scoring import scoring
+from core.simulation import simulator
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     print(f"🚀 AIBET API starting at {datetime.utcnow()}")
+    await ingestion.start()
     yield
+    await schedule_cache.stop()
+    await ingestion.stop()
+    simulator.stop()
     print("🔄 AIBET API shutting down")
 
 
@@ -39,6 +53,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Schedule and AI endpoints, shared by every entry point
+app.include_router(router)
+
 
 @app.get("/")
 async def root():
@@ -74,69 +91,19 @@ async def api_health():
     }
 
 
-@app.get("/v1/nhl/schedule")
-async def get_nhl_schedule():
-    """Get NHL schedule - educational version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "NHL schedule service - educational analytics only",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/khl/schedule")
-async def get_khl_schedule():
-    """Get KHL schedule - educational version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "KHL schedule service - educational analytics only",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/cs2/upcoming")
-async def get_cs2_upcoming():
-    """Get CS2 upcoming matches - educational version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "CS2 upcoming matches service - educational analytics only",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/ai/context/{match_id}")
-async def get_ai_context(match_id: str):
-    """Get AI context - educational version"""
-    return {
-        "success": True,
-        "data": {
-            "match_id": match_id,
-            "context": "Educational analysis only",
-            "not_a_prediction": True,
-            "educational_purpose": True,
-            "message": "AI context service - educational analysis only"
-        },
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/ai/score/{match_id}")
-async def get_ai_score(match_id: str):
-    """Get AI score - educational version"""
+@app.get("/metrics")
+async def metrics():
+    """Schedule ingestion and cache metrics"""
     return {
-        "success": True,
-        "data": {
-            "match_id": match_id,
-            "ai_score": 0.5,
-            "confidence": 0.5,
-            "risk_level": "medium",
-            "not_a_prediction": True,
-            "educational_purpose": True,
-            "message": "AI scoring service - educational analysis only"
-        },
+        "ingestion": ingestion.get_stats(),
+        "schedule_cache": schedule_cache.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "scoring": scoring.get_stats(),
+        "ratings": ratings.get_stats(),
+        "features": team_features.get_stats(),
+        "simulation": simulator.get_stats(),
+        "context": context_builder.get_stats(),
+        "coalescing": ai_requests.get_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -4,17 +4,41 @@ Simplified for Render Free deployment
 """
 
 import os
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
+from datetime import datetime, timezone
+
+from core.coalesce import ai_requests
+from core.context import context_builder
+from core.explain import explanations
+from core.features import team_features
+from core.ingest import ingestion
+from core.match_index import match_index
+from core.odds_store import odds_store
+from core.pagination import decode_cursor, ndjson_response, paginate
+from core.ratings import ratings
+from core.response_cache import response_cache
+from core.routes import find_match, router
+from core.schedule_cache import schedule_cache
+from core.scoring import scoring
+from core.simulation import simulator
+from core.value_index import value_index
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     print(f"🚀 AIBET Analytics Platform starting at {datetime.utcnow()}")
+    await ingestion.start()
+    await explanations.start()
     yield
+    await explanations.stop()
+    await schedule_cache.stop()
+    await ingestion.stop()
+    simulator.stop()
     print("🔄 AIBET Analytics Platform shutting down")
 
 
@@ -37,6 +61,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Schedule and AI endpoints, shared by every entry point
+app.include_router(router)
+
 
 # Health check endpoint
 @app.get("/health")
@@ -70,6 +97,7 @@ async def root():
             "ai": {
                 "context": "/v1/ai/context/{match_id}",
                 "score": "/v1/ai/score/{match_id}",
+                "score_batch": "/v1/ai/score/batch",
                 "explain": "/v1/ai/explain/{match_id}",
                 "value": "/v1/ai/value"
             }
@@ -78,91 +106,94 @@ async def root():
 
 
 # Basic API endpoints (simplified for stability)
-@app.get("/v1/nhl/schedule")
-async def get_nhl_schedule():
-    """Get NHL schedule - simplified version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "NHL schedule service - coming soon",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/khl/schedule")
-async def get_khl_schedule():
-    """Get KHL schedule - simplified version"""
+@app.get("/metrics")
+async def metrics():
+    """Schedule ingestion and cache metrics"""
     return {
-        "success": True,
-        "data": [],
-        "message": "KHL schedule service - coming soon",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/cs2/upcoming")
-async def get_cs2_upcoming():
-    """Get CS2 upcoming matches - simplified version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "CS2 upcoming matches service - coming soon",
+        "ingestion": ingestion.get_stats(),
+        "schedule_cache": schedule_cache.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "scoring": scoring.get_stats(),
+        "ratings": ratings.get_stats(),
+        "features": team_features.get_stats(),
+        "simulation": simulator.get_stats(),
+        "context": context_builder.get_stats(),
+        "coalescing": ai_requests.get_stats(),
+        "value_index": value_index.get_stats(),
+        "odds_store": odds_store.get_stats(),
+        "explanations": explanations.get_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
 
 @app.get("/v1/odds/nhl")
-async def get_nhl_odds():
-    """Get NHL odds - simplified version"""
+async def get_nhl_odds(
+    match_id: Optional[str] = None,
+    market: str = "moneyline",
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    bucket: Optional[int] = Query(None, ge=60)
+):
+    """Get NHL odds - latest prices, or one market's history (epoch seconds, bucketed if asked)"""
+    if match_id is None:
+        data = odds_store.latest("nhl")
+    else:
+        data = odds_store.history(match_id, market, start, end, bucket)
+        if data is None:
+            raise HTTPException(status_code=404, detail=f"No {market} odds for {match_id}")
     return {
         "success": True,
-        "data": [],
-        "message": "NHL odds service - coming soon",
+        "data": data,
+        "message": "NHL odds service",
         "timestamp": datetime.utcnow().isoformat()
     }
 
 
 @app.get("/v1/unified/matches")
-async def get_unified_matches():
-    """Get unified matches - simplified version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "Unified matches service - coming soon",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/ai/context/{match_id}")
-async def get_ai_context(match_id: str):
-    """Get AI context - simplified educational version"""
-    return {
-        "success": True,
-        "data": {
-            "match_id": match_id,
-            "context": "Educational analysis only",
-            "not_a_prediction": True,
-            "educational_purpose": True,
-            "message": "AI context service - educational analysis only"
-        },
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/ai/score/{match_id}")
-async def get_ai_score(match_id: str):
-    """Get AI score - simplified educational version"""
+async def get_unified_matches(
+    league: Optional[str] = None,
+    team: Optional[str] = None,
+    date: Optional[str] = None,
+    hours: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """Get upcoming matches across leagues, merged by start time"""
+    try:
+        after = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    leagues = [name.strip().lower() for name in league.split(",")] if league else None
+    if date is not None:
+        try:
+            start = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+        end = start + 86400
+    else:
+        start = time.time()
+        end = start + hours * 3600 if hours is not None else None
+    sources = await schedule_cache.load([name for name in leagues if name in ingestion.leagues] if leagues else None)
+    
+    if team is not None:
+        matches = match_index.team(team, start, end, after)
+        if leagues is not None:
+            matches = (match for match in matches if match.league in leagues)
+    elif date is not None and leagues is None:
+        matches = match_index.on_date(date, after)
+    else:
+        matches = match_index.merged(start, end, leagues, after)
+    if format == "ndjson":
+        return ndjson_response(matches, limit)
+    
+    data, next_cursor = paginate(matches, limit)
     return {
         "success": True,
-        "data": {
-            "match_id": match_id,
-            "ai_score": 0.5,
-            "confidence": 0.5,
-            "risk_level": "medium",
-            "not_a_prediction": True,
-            "educational_purpose": True,
-            "message": "AI scoring service - educational analysis only"
-        },
+        "data": data,
+        "next_cursor": next_cursor,
+        "sources": sources,
+        "message": "Unified matches service",
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -170,11 +201,18 @@ async def get_ai_score(match_id: str):
 @app.get("/v1/ai/explain/{match_id}")
 async def get_ai_explanation(match_id: str):
     """Get AI explanation - simplified educational version"""
+    match = await find_match(match_id)
+    # Factors come from one rating checkpoint, even while new results are applied
+    score = scoring.refresh().result(match_id)
+    attribution = explanations.get(match_id)
     return {
         "success": True,
         "data": {
             "match_id": match_id,
-            "explanation": "Educational analysis only - not a prediction",
+            "match": match,
+            "factors": score["factors"] if score else None,
+            "attribution": attribution,
+            "explanation": attribution["summary"] if attribution else "Educational analysis only - not a prediction",
             "not_a_prediction": True,
             "educational_purpose": True,
             "message": "AI explanation service - educational analysis only"
@@ -184,11 +222,15 @@ async def get_ai_explanation(match_id: str):
 
 
 @app.get("/v1/ai/value")
-async def get_ai_value():
-    """Get AI value signals - simplified educational version"""
+async def get_ai_value(
+    limit: int = Query(20, ge=1, le=100),
+    min_edge: float = 0.0,
+    league: Optional[str] = None
+):
+    """Get AI value signals - top entries of the edge-sorted value index"""
     return {
         "success": True,
-        "data": [],
+        "data": value_index.top(limit, min_edge, league),
         "message": "AI value signals service - educational analysis only",
         "not_a_prediction": True,
         "educational_purpose": True,
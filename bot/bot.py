@@ -10,43 +10,17 @@ from datetime import datetime
 from typing import List
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, filters
 
 from core.config import config
+from core.dispatcher import outbound
 from core.storage import storage
+from core.templates import TemplateRegistry
+from core.updates import allowed_updates
 
 
-class AIBOTBot:
-    """AIBET Telegram Bot"""
-    
-    def __init__(self):
-        self.application = None
-        self.running = False
-    
-    async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Handle /start command with inline buttons"""
-        try:
-            user_id = update.effective_user.id
-            username = update.effective_user.username or update.effective_user.first_name or "User"
-            
-            # Store user data
-            storage.set_user_data(user_id, "last_command", "start")
-            storage.set_user_data(user_id, "username", username)
-            
-            # Create inline keyboard
-            keyboard = [
-                [
-                    InlineKeyboardButton("🏒 NHL", callback_data="nhl"),
-                    InlineKeyboardButton("🏒 KHL", callback_data="khl")
-                ],
-                [
-                    InlineKeyboardButton("🎮 CS2", callback_data="cs2"),
-                    InlineKeyboardButton("📊 О проекте", callback_data="about")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            welcome_message = f"""
+# Reply templates, rendered and Markdown-checked once at startup
+START_TEMPLATE = """
 🚀 **AIBET - Educational Sports Analytics Bot**
 
 Добро пожаловать, {username}!
@@ -62,23 +36,8 @@ class AIBOTBot:
 Веб-платформа: https://aibet-analytics.onrender.com
 Документация: https://aibet-analytics.onrender.com/docs
 """
-            
-            await update.message.reply_text(
-                welcome_message,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
-            
-            print(f"📤 Start command sent to user {username} (ID: {user_id})")
-            
-        except Exception as e:
-            print(f"❌ Error in start_command: {e}")
-            await update.message.reply_text("❌ Временная ошибка сервиса")
-    
-    async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Handle /help command"""
-        try:
-            help_message = """
+
+HELP_TEMPLATE = """
 🤖 **AIBET - Помощь**
 
 📋 **Доступные команды:**
@@ -109,23 +68,12 @@ API: https://aibet-analytics.onrender.com/docs
 ❓ **Поддержка:**
 Для технических вопросов проверьте веб-платформу.
 """
-            
-            await update.message.reply_text(help_message, parse_mode='Markdown')
-            print(f"📤 Help command sent to user {update.effective_user.id}")
-            
-        except Exception as e:
-            print(f"❌ Error in help_command: {e}")
-            await update.message.reply_text("❌ Временная ошибка сервиса")
-    
-    async def status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Handle /status command"""
-        try:
-            stats = storage.get_stats()
-            status_message = f"""
+
+STATUS_TEMPLATE = """
 📊 **Статус AIBOT**
 
 ✅ **Статус бота:** Онлайн
-🕒 **Текущее время:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC
+🕒 **Текущее время:** {current_time} UTC
 🤖 **Версия бота:** 1.0.0
 
 🌐 **Подключенные сервисы:**
@@ -140,27 +88,17 @@ API: https://aibet-analytics.onrender.com/docs
 • AI инсайты: ✅ Только образовательные
 
 📊 **Статистика хранилища:**
-• Всего ключей: {stats['total_keys']}
-• Всего пользователей: {stats['total_users']}
-• Время обновления: {stats['timestamp']}
+• Всего ключей: {total_keys}
+• Всего пользователей: {total_users}
+• Время обновления: {updated_at}
 
 ⚠️ **Режим работы:** Только образовательная аналитика
 🔒 **Соответствие:** Только образовательные цели
 
 🌐 **Веб-платформа:** https://aibet-analytics.onrender.com
 """
-            
-            await update.message.reply_text(status_message, parse_mode='Markdown')
-            print(f"📤 Status command sent to user {update.effective_user.id}")
-            
-        except Exception as e:
-            print(f"❌ Error in status_command: {e}")
-            await update.message.reply_text("❌ Временная ошибка сервиса")
-    
-    async def about_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Handle /about command"""
-        try:
-            about_message = """
+
+ABOUT_TEMPLATE = """
 🏆 **О проекте AIBET**
 
 📖 **Миссия:**
@@ -209,29 +147,8 @@ API: https://aibet-analytics.onrender.com/docs
 📈 **Версия:** 1.0.0
 🕒 **Последнее обновление:** 2026-02-08
 """
-            
-            await update.message.reply_text(about_message, parse_mode='Markdown')
-            print(f"📤 About command sent to user {update.effective_user.id}")
-            
-        except Exception as e:
-            print(f"❌ Error in about_command: {e}")
-            await update.message.reply_text("❌ Временная ошибка сервиса")
-    
-    async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Handle inline button callbacks"""
-        try:
-            query = update.callback_query
-            await query.answer()
-            
-            user_id = update.effective_user.id
-            callback_data = query.data
-            
-            # Store button click
-            storage.set_user_data(user_id, "last_button", callback_data)
-            
-            # Handle different buttons
-            if callback_data == "nhl":
-                message = """
+
+BUTTON_NHL_TEMPLATE = """
 🏒 **NHL - Национальная Хоккейная Лига**
 
 📊 **Доступные функции:**
@@ -257,9 +174,8 @@ API: https://aibet-analytics.onrender.com/docs
 🌐 **Подробности:**
 https://aibet-analytics.onrender.com/docs
 """
-            
-            elif callback_data == "khl":
-                message = """
+
+BUTTON_KHL_TEMPLATE = """
 🏒 **KHL - Континентальная Хоккейная Лига**
 
 📊 **Доступные функции:**
@@ -285,9 +201,8 @@ https://aibet-analytics.onrender.com/docs
 🌐 **Подробности:**
 https://aibet-analytics.onrender.com/docs
 """
-            
-            elif callback_data == "cs2":
-                message = """
+
+BUTTON_CS2_TEMPLATE = """
 🎮 **CS2 - Counter-Strike 2 Киберспорт**
 
 📊 **Доступные функции:**
@@ -313,9 +228,8 @@ https://aibet-analytics.onrender.com/docs
 🌐 **Подробности:**
 https://aibet-analytics.onrender.com/docs
 """
-            
-            elif callback_data == "about":
-                message = """
+
+BUTTON_ABOUT_TEMPLATE = """
 📊 **О проекте AIBET**
 
 🏆 **Наша миссия:**
@@ -352,11 +266,128 @@ https://aibet-analytics.onrender.com
 📞 **Связь:**
 Технические вопросы через веб-платформу.
 """
+
+templates = TemplateRegistry()
+templates.register("start", START_TEMPLATE)
+templates.register("help", HELP_TEMPLATE)
+templates.register("status", STATUS_TEMPLATE)
+templates.register("about", ABOUT_TEMPLATE)
+templates.register("button_nhl", BUTTON_NHL_TEMPLATE)
+templates.register("button_khl", BUTTON_KHL_TEMPLATE)
+templates.register("button_cs2", BUTTON_CS2_TEMPLATE)
+templates.register("button_about", BUTTON_ABOUT_TEMPLATE)
+
+
+class AIBOTBot:
+    """AIBET Telegram Bot"""
+    
+    def __init__(self):
+        self.application = None
+        self.running = False
+        self._stop_event = None
+    
+    async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /start command with inline buttons"""
+        try:
+            user_id = update.effective_user.id
+            username = update.effective_user.username or update.effective_user.first_name or "User"
+            
+            # Store user data
+            storage.set_user_data(user_id, "last_command", "start")
+            storage.set_user_data(user_id, "username", username)
+            
+            # Create inline keyboard
+            keyboard = [
+                [
+                    InlineKeyboardButton("🏒 NHL", callback_data="nhl"),
+                    InlineKeyboardButton("🏒 KHL", callback_data="khl")
+                ],
+                [
+                    InlineKeyboardButton("🎮 CS2", callback_data="cs2"),
+                    InlineKeyboardButton("📊 О проекте", callback_data="about")
+                ]
+            ]
+            reply_markup = InlineKeyboardMarkup(keyboard)
             
+            welcome_message = templates.render("start", username=username)
+            
+            await outbound.reply_text(
+                update.message,
+                welcome_message,
+                reply_markup=reply_markup,
+                parse_mode='Markdown'
+            )
+            
+            print(f"📤 Start command sent to user {username} (ID: {user_id})")
+            
+        except Exception as e:
+            print(f"❌ Error in start_command: {e}")
+            await outbound.reply_text(update.message, "❌ Временная ошибка сервиса")
+    
+    async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /help command"""
+        try:
+            help_message = templates.render("help")
+            
+            await outbound.reply_text(update.message, help_message, parse_mode='Markdown')
+            print(f"📤 Help command sent to user {update.effective_user.id}")
+            
+        except Exception as e:
+            print(f"❌ Error in help_command: {e}")
+            await outbound.reply_text(update.message, "❌ Временная ошибка сервиса")
+    
+    async def status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /status command"""
+        try:
+            stats = storage.get_stats()
+            status_message = templates.render(
+                "status",
+                current_time=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+                total_keys=stats['total_keys'],
+                total_users=stats['total_users'],
+                updated_at=stats['timestamp']
+            )
+            
+            await outbound.reply_text(update.message, status_message, parse_mode='Markdown')
+            print(f"📤 Status command sent to user {update.effective_user.id}")
+            
+        except Exception as e:
+            print(f"❌ Error in status_command: {e}")
+            await outbound.reply_text(update.message, "❌ Временная ошибка сервиса")
+    
+    async def about_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /about command"""
+        try:
+            about_message = templates.render("about")
+            
+            await outbound.reply_text(update.message, about_message, parse_mode='Markdown')
+            print(f"📤 About command sent to user {update.effective_user.id}")
+            
+        except Exception as e:
+            print(f"❌ Error in about_command: {e}")
+            await outbound.reply_text(update.message, "❌ Временная ошибка сервиса")
+    
+    async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle inline button callbacks"""
+        try:
+            query = update.callback_query
+            await query.answer()
+            
+            user_id = update.effective_user.id
+            callback_data = query.data
+            
+            # Store button click
+            storage.set_user_data(user_id, "last_button", callback_data)
+            
+            # Handle different buttons
+            button = f"button_{callback_data}"
+            if button in templates:
+                message = templates.render(button)
             else:
                 message = "❌ Неизвестная команда"
             
-            await query.edit_message_text(
+            await outbound.edit_message_text(
+                query,
                 message,
                 parse_mode='Markdown'
             )
@@ -384,23 +415,29 @@ https://aibet-analytics.onrender.com
         
         try:
             if update and hasattr(update, 'message'):
-                await update.message.reply_text(error_message)
+                await outbound.reply_text(update.message, error_message)
         except:
             pass  # Avoid error loops
     
+    def stop(self) -> None:
+        """Ask a running bot to shut down"""
+        self.running = False
+        if self._stop_event:
+            self._stop_event.set()
+    
     def setup_signal_handlers(self):
         """Setup signal handlers for graceful shutdown"""
-        def signal_handler(signum, frame):
+        loop = asyncio.get_running_loop()
+        
+        def signal_handler(signum):
             print(f"\n🔄 Получен сигнал {signum}, завершение работы...")
-            self.running = False
-            if self.application:
-                self.application.stop()
+            self.stop()
         
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, signal_handler, signum)
     
-    async def run(self):
-        """Run the bot"""
+    async def run(self, handle_signals: bool = True):
+        """Run the bot until stop() or a signal; handle_signals=False leaves signals to the caller"""
         try:
             print("🚀 Запуск AIBET Telegram Bot...")
             print(f"🤖 Token: {config.BOT_TOKEN[:10]}...")
@@ -408,34 +445,50 @@ https://aibet-analytics.onrender.com
             
             # Create application
             self.application = Application.builder().token(config.BOT_TOKEN).build()
+            self._stop_event = asyncio.Event()
             
             # Add handlers
-            self.application.add_handler(CommandHandler("start", self.start_command))
-            self.application.add_handler(CommandHandler("help", self.help_command))
-            self.application.add_handler(CommandHandler("status", self.status_command))
-            self.application.add_handler(CommandHandler("about", self.about_command))
+            self.application.add_handler(CommandHandler("start", self.start_command, filters=filters.UpdateType.MESSAGE))
+            self.application.add_handler(CommandHandler("help", self.help_command, filters=filters.UpdateType.MESSAGE))
+            self.application.add_handler(CommandHandler("status", self.status_command, filters=filters.UpdateType.MESSAGE))
+            self.application.add_handler(CommandHandler("about", self.about_command, filters=filters.UpdateType.MESSAGE))
             self.application.add_handler(CallbackQueryHandler(self.button_callback))
             
             # Add error handler
             self.application.add_error_handler(self.error_handler)
             
             # Setup signal handlers
-            self.setup_signal_handlers()
+            if handle_signals:
+                self.setup_signal_handlers()
             
             print("✅ Обработчики команд зарегистрированы")
             print("🤖 AIBET запускается...")
             
-            # Run bot with polling
+            # Start storage write-behind
+            await storage.start()
+            
+            # Run bot with polling on the current event loop
             self.running = True
-            await self.application.run_polling(
-                allowed_updates=Update.ALL_TYPES,
+            await self.application.initialize()
+            await self.application.start()
+            await self.application.updater.start_polling(
+                allowed_updates=allowed_updates(self.application),
                 drop_pending_updates=True
             )
+            await self._stop_event.wait()
             
         except Exception as e:
             print(f"❌ Критическая ошибка при запуске бота: {e}")
             raise
         finally:
+            if self.application:
+                if self.application.updater and self.application.updater.running:
+                    await self.application.updater.stop()
+                if self.application.running:
+                    await self.application.stop()
+                await self.application.shutdown()
+            await outbound.stop()
+            await storage.stop()
             print("🔄 AIBET завершает работу...")
 
 
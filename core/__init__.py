@@ -4,5 +4,6 @@ AIBET Core Module
 
 from .config import config, Config
 from .storage import storage, Storage
+from .webhook import UpdateQueue, UpdateDeduplicator
 
-__all__ = ["config", "Config", "storage", "Storage"]
+__all__ = ["config", "Config", "storage", "Storage", "UpdateQueue", "UpdateDeduplicator"]
@@ -0,0 +1,130 @@
+"""
+AIBET Core Request Coalescing
+Single-flight execution of identical concurrent computations, with a short result cache
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .config import config
+
+
+class _RouteStats:
+    """Counters of one coalesced route"""
+
+    __slots__ = ("leaders", "coalesced", "cache_hits", "errors")
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.errors = 0
+
+
+class SingleFlight:
+    """Share one in-flight computation among concurrent callers with the same key
+
+    The first caller starts the work; later ones await the same task and get the same result or
+    the same exception. Successful results are then served from a cache for `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = 2.0, max_entries: int = 4096):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._inflight: Dict[Tuple[str, Hashable], asyncio.Task] = {}
+        self._results: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._stats: Dict[str, _RouteStats] = {}
+
+    async def do(
+        self,
+        name: str,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Result of `compute` for `key` under route `name`, joined or cached when possible"""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _RouteStats()
+        full_key = (name, key)
+        cached = self._results.get(full_key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < self._ttl:
+                stats.cache_hits += 1
+                return cached[1]
+            del self._results[full_key]
+
+        task = self._inflight.get(full_key)
+        if task is None:
+            stats.leaders += 1
+            task = asyncio.create_task(compute(), name=f"single-flight-{name}")
+            self._inflight[full_key] = task
+            task.add_done_callback(lambda t: self._done(full_key, stats, t, cacheable))
+        else:
+            stats.coalesced += 1
+        # Shielded so one cancelled caller does not abort the work others wait on
+        return await asyncio.shield(task)
+
+    def _done(self, key: Tuple[str, Hashable], stats: _RouteStats, task: asyncio.Task,
+              cacheable: Optional[Callable[[Any], bool]]) -> None:
+        """Forget a finished computation; keep its result if it succeeded"""
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            stats.errors += 1
+            return
+        result = task.result()
+        if self._ttl > 0 and (cacheable is None or cacheable(result)):
+            self._results[key] = (time.monotonic(), result)
+            self._results.move_to_end(key)
+            while len(self._results) > self._max_entries:
+                self._results.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            "in_flight": len(self._inflight),
+            "cached": len(self._results),
+            "routes": {
+                name: {"leaders": s.leaders, "coalesced": s.coalesced, "cache_hits": s.cache_hits,
+                       "errors": s.errors}
+                for name, s in self._stats.items()
+            },
+        }
+
+
+# Global coalescing layer of the AI routes
+ai_requests = SingleFlight(ttl=config.AI_RESULT_TTL)
+
+
+if __name__ == "__main__":
+    # A burst of identical requests with and without coalescing:
+    #   python -m core.coalesce [requests]
+    import sys
+
+    async def bench(burst: int) -> None:
+        calls = 0
+
+        async def expensive() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+
+        started = time.perf_counter()
+        await asyncio.gather(*(expensive() for _ in range(burst)))
+        plain = time.perf_counter() - started
+        plain_calls, calls = calls, 0
+        flight = SingleFlight(ttl=2.0)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(flight.do("score", "nhl:1", expensive) for _ in range(burst)))
+        coalesced = time.perf_counter() - started
+        await flight.do("score", "nhl:1", expensive)
+        print(f"📊 burst of {burst} identical requests, all got result {set(results)}")
+        print(f"  uncoalesced: {plain_calls} computations in {plain * 1000:.1f}ms")
+        print(f"  coalesced:   {calls} computation in {coalesced * 1000:.1f}ms; {flight.get_stats()['routes']}")
+
+    asyncio.run(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
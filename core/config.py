@@ -16,6 +16,70 @@ class Config:
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     
+    # Webhook ingestion
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", "4"))
+    WEBHOOK_QUEUE_SIZE: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+    WEBHOOK_RETRY_AFTER: int = int(os.getenv("WEBHOOK_RETRY_AFTER", "5"))
+    WEBHOOK_DEDUP_WINDOW: int = int(os.getenv("WEBHOOK_DEDUP_WINDOW", "10000"))
+    
+    # Outbound message rate limits (Telegram allows ~30 msg/s, ~1 msg/s per chat)
+    OUTBOUND_GLOBAL_RATE: float = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))
+    OUTBOUND_CHAT_RATE: float = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+    OUTBOUND_CHAT_BURST: float = float(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+    OUTBOUND_WORKERS: int = int(os.getenv("OUTBOUND_WORKERS", "8"))
+    
+    # Storage: "memory", "sqlite" or "log"
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "memory")
+    STORAGE_PATH: str = os.getenv("STORAGE_PATH", "aibet.db")
+    STORAGE_MAX_ENTRIES: int = int(os.getenv("STORAGE_MAX_ENTRIES", "100000"))
+    STORAGE_DEFAULT_TTL: float = float(os.getenv("STORAGE_DEFAULT_TTL", "0"))
+    STORAGE_FLUSH_INTERVAL: float = float(os.getenv("STORAGE_FLUSH_INTERVAL", "1.0"))
+    STORAGE_FLUSH_BATCH: int = int(os.getenv("STORAGE_FLUSH_BATCH", "500"))
+    STORAGE_LOG_DIR: str = os.getenv("STORAGE_LOG_DIR", "data")
+    STORAGE_FSYNC: str = os.getenv("STORAGE_FSYNC", "batch")
+    STORAGE_COMPACT_OPS: int = int(os.getenv("STORAGE_COMPACT_OPS", "100000"))
+    
+    # Schedule ingestion
+    NHL_SCHEDULE_URL: str = os.getenv("NHL_SCHEDULE_URL", "https://api-web.nhle.com/v1/schedule")
+    KHL_SCHEDULE_URL: str = os.getenv("KHL_SCHEDULE_URL", "https://khl.api.webcaster.pro/api/khl_mobile/events_v2")
+    CS2_MATCHES_URL: str = os.getenv("CS2_MATCHES_URL", "https://api.pandascore.co/csgo/matches/upcoming")
+    PANDASCORE_TOKEN: Optional[str] = os.getenv("PANDASCORE_TOKEN")
+    INGEST_WEEKS: int = int(os.getenv("INGEST_WEEKS", "2"))
+    INGEST_SOURCE_CONCURRENCY: int = int(os.getenv("INGEST_SOURCE_CONCURRENCY", "4"))
+    INGEST_MAX_CONNECTIONS: int = int(os.getenv("INGEST_MAX_CONNECTIONS", "20"))
+    INGEST_TIMEOUT: float = float(os.getenv("INGEST_TIMEOUT", "10"))
+    # Schedules are served from cache, refreshed in the background after the soft TTL
+    # and kept through upstream outages until the hard TTL
+    SCHEDULE_SOFT_TTL: float = float(os.getenv("SCHEDULE_SOFT_TTL", "300"))
+    SCHEDULE_HARD_TTL: float = float(os.getenv("SCHEDULE_HARD_TTL", "3600"))
+    # Encoded GET responses kept for ETag revalidation, and their client max-age
+    RESPONSE_CACHE_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_ENTRIES", "1024"))
+    RESPONSE_MAX_AGE: int = int(os.getenv("RESPONSE_MAX_AGE", "15"))
+    # Serve recorded responses from this directory instead of calling upstream
+    INGEST_FIXTURES_DIR: str = os.getenv("INGEST_FIXTURES_DIR", "")
+    # Monte Carlo trials per match, and pool workers for large jobs (0 = one per core)
+    SIMULATION_TRIALS: int = int(os.getenv("SIMULATION_TRIALS", "20000"))
+    SIMULATION_WORKERS: int = int(os.getenv("SIMULATION_WORKERS", "0"))
+    # Odds history columns kept in memory; older series spill to memory-mapped files here
+    ODDS_MEMORY_BUDGET: int = int(os.getenv("ODDS_MEMORY_BUDGET", str(64 * 1024 * 1024)))
+    ODDS_SPILL_DIR: str = os.getenv("ODDS_SPILL_DIR", "data/odds")
+    # Explanation cache size (bytes of encoded JSON), and the background precompute of
+    # matches starting within the next EXPLAIN_HORIZON_HOURS
+    EXPLAIN_CACHE_BYTES: int = int(os.getenv("EXPLAIN_CACHE_BYTES", str(8 * 1024 * 1024)))
+    EXPLAIN_HORIZON_HOURS: float = float(os.getenv("EXPLAIN_HORIZON_HOURS", "24"))
+    EXPLAIN_PRECOMPUTE_INTERVAL: float = float(os.getenv("EXPLAIN_PRECOMPUTE_INTERVAL", "600"))
+    # Deadlines (seconds) of each /v1/ai/context source and of the whole request
+    CONTEXT_SOURCE_TIMEOUT: float = float(os.getenv("CONTEXT_SOURCE_TIMEOUT", "0.5"))
+    CONTEXT_TIMEOUT: float = float(os.getenv("CONTEXT_TIMEOUT", "1.5"))
+    # Seconds a coalesced AI route result is reused after its computation finishes
+    AI_RESULT_TTL: float = float(os.getenv("AI_RESULT_TTL", "2"))
+    # Model versions live in MODEL_DIR/<version>/*.npy; the newest is served unless pinned
+    MODEL_DIR: str = os.getenv("MODEL_DIR", "models")
+    MODEL_VERSION: str = os.getenv("MODEL_VERSION", "")
+    # Finished games per team in the rolling feature window, and the EWMA weight of the newest
+    FEATURE_WINDOW: int = int(os.getenv("FEATURE_WINDOW", "10"))
+    FEATURE_EWMA_ALPHA: float = float(os.getenv("FEATURE_EWMA_ALPHA", "0.3"))
+    
     # Debug mode
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
     
@@ -0,0 +1,336 @@
+"""
+AIBET Core Context Builder
+Concurrent fan-out to the match context sources, with deadlines and partial results
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import config
+from .features import TeamFeatureStore, team_features
+from .ingest import MatchRecord
+from .match_index import MatchIndex, match_index, team_key
+from .odds_store import OddsStore, odds_store
+from .scoring import ScoreBatch
+from .simulation import Simulator, simulator
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Finished games per team in the form and head-to-head sections
+RECENT_GAMES = 5
+
+ContextSource = Callable[..., Awaitable[Any]]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Record one latency"""
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, in milliseconds"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return round(self.max * 1000, 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Bucket counts and summary figures"""
+        buckets = {f"le_{bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": buckets,
+        }
+
+
+class _SourceStats:
+    """Latency and outcome counts of one source"""
+
+    __slots__ = ("latency", "timeouts", "errors")
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.timeouts = 0
+        self.errors = 0
+
+
+class ContextBuilder:
+    """Run every registered source at once; each gets its own deadline, the whole build another
+
+    A source that times out or fails is reported by name instead of failing the build.
+    """
+
+    def __init__(self, source_timeout: float = 0.5, total_timeout: float = 1.5):
+        self._sources: Dict[str, ContextSource] = {}
+        self._timeouts: Dict[str, float] = {}
+        self._source_timeout = source_timeout
+        self._total_timeout = total_timeout
+        self._stats: Dict[str, _SourceStats] = {}
+
+        # Metrics
+        self._builds = 0
+        self._partial = 0
+        self._latency = LatencyHistogram()
+
+    def register(self, name: str, source: ContextSource, timeout: Optional[float] = None) -> None:
+        """Add a section; `timeout` overrides the per-source default"""
+        self._sources[name] = source
+        self._stats[name] = _SourceStats()
+        if timeout is not None:
+            self._timeouts[name] = timeout
+
+    async def _run(self, name: str, source: ContextSource, args: tuple) -> Any:
+        """One source under its deadline, with its latency recorded either way"""
+        stats = self._stats[name]
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(source(*args), self._timeouts.get(name, self._source_timeout))
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f"⚠️ Context source {name} failed: {e!r}")
+            raise
+        finally:
+            stats.latency.observe(time.perf_counter() - started)
+
+    async def build(self, *args: Any) -> Dict[str, Any]:
+        """Sections keyed by source name, plus which ones timed out or failed"""
+        started = time.perf_counter()
+        tasks = {name: asyncio.create_task(self._run(name, source, args), name=f"context-{name}")
+                 for name, source in self._sources.items()}
+        _, pending = await asyncio.wait(tasks.values(), timeout=self._total_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        sections: Dict[str, Any] = {}
+        timed_out: List[str] = []
+        failed: List[str] = []
+        for name, task in tasks.items():
+            if task in pending:
+                self._stats[name].timeouts += 1
+                timed_out.append(name)
+            elif isinstance(task.exception(), asyncio.TimeoutError):
+                timed_out.append(name)
+            elif task.exception() is not None:
+                failed.append(name)
+            else:
+                sections[name] = task.result()
+            if name not in sections:
+                sections[name] = None
+
+        elapsed = time.perf_counter() - started
+        self._builds += 1
+        self._latency.observe(elapsed)
+        if timed_out or failed:
+            self._partial += 1
+        return {
+            "sections": sections,
+            "complete": not (timed_out or failed),
+            "timed_out": timed_out,
+            "failed": failed,
+            "elapsed_ms": round(elapsed * 1000, 3),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get context builder statistics"""
+        return {
+            "builds": self._builds,
+            "partial": self._partial,
+            "latency": self._latency.snapshot(),
+            "sources": {
+                name: {"timeouts": stats.timeouts, "errors": stats.errors, "latency": stats.latency.snapshot()}
+                for name, stats in self._stats.items()
+            },
+        }
+
+
+def _iso(start_time: float) -> str:
+    """ISO UTC timestamp"""
+    return datetime.fromtimestamp(start_time, timezone.utc).isoformat()
+
+
+def _recent(index: MatchIndex, team: str, before: float) -> List[MatchRecord]:
+    """A team's finished games with a result, oldest first"""
+    return [m for m in index.team(team, end=before) if m.has_result]
+
+
+def team_form(index: MatchIndex, team: str, before: float, limit: int = RECENT_GAMES) -> Dict[str, Any]:
+    """Results and goal averages of a team's last finished games"""
+    key = team_key(team)
+    results = []
+    scored = conceded = 0
+    games = _recent(index, team, before)[-limit:]
+    for m in games:
+        home = team_key(m.home) == key
+        goals_for, goals_against = (m.home_score, m.away_score) if home else (m.away_score, m.home_score)
+        scored += goals_for
+        conceded += goals_against
+        results.append("W" if goals_for > goals_against else "L" if goals_for < goals_against else "D")
+    return {
+        "team": team,
+        "games": len(games),
+        "results": "".join(results),
+        "goals_for_avg": round(scored / len(games), 2) if games else None,
+        "goals_against_avg": round(conceded / len(games), 2) if games else None,
+    }
+
+
+def head_to_head(index: MatchIndex, home: str, away: str, before: float, limit: int = RECENT_GAMES) -> Dict[str, Any]:
+    """Last finished meetings of two teams"""
+    pair = {team_key(home), team_key(away)}
+    meetings = [m for m in _recent(index, home, before) if {team_key(m.home), team_key(m.away)} == pair][-limit:]
+    home_wins = sum(1 for m in meetings
+                    if (m.home_score > m.away_score) == (team_key(m.home) == team_key(home))
+                    and m.home_score != m.away_score)
+    away_wins = sum(1 for m in meetings if m.home_score != m.away_score) - home_wins
+    return {
+        "meetings": [{"match_id": m.match_id, "start_time": _iso(m.start_time), "home": m.home, "away": m.away,
+                      "score": f"{m.home_score}-{m.away_score}"} for m in meetings],
+        "home_wins": home_wins,
+        "away_wins": away_wins,
+    }
+
+
+def odds_movement(store: OddsStore, match_id: str, market: str = "moneyline") -> Optional[Dict[str, Any]]:
+    """Opening and latest prices of a market, with the hourly path between them"""
+    history = store.history(match_id, market, bucket=3600)
+    if history is None or not history["timestamps"]:
+        return None
+    opening, latest = history["prices"][0], history["prices"][-1]
+    return {
+        "market": market,
+        "opening": dict(zip(history["outcomes"], opening)),
+        "latest": dict(zip(history["outcomes"], latest)),
+        "change": {outcome: round(last - first, 3)
+                   for outcome, first, last in zip(history["outcomes"], opening, latest)},
+        "hourly": history,
+    }
+
+
+def create_context_builder(
+    index: MatchIndex = match_index,
+    store: OddsStore = odds_store,
+    sim: Simulator = simulator,
+    features: TeamFeatureStore = team_features,
+) -> ContextBuilder:
+    """Context builder over the match index, odds store, feature store, score batch and simulator
+
+    Sources are called with (match, batch), so every section reads the same rating checkpoint.
+    """
+    builder = ContextBuilder(source_timeout=config.CONTEXT_SOURCE_TIMEOUT, total_timeout=config.CONTEXT_TIMEOUT)
+
+    async def schedule(match: MatchRecord, batch: ScoreBatch) -> Dict[str, Any]:
+        return match.to_dict()
+
+    async def ratings(match: MatchRecord, batch: ScoreBatch) -> Optional[Dict[str, Any]]:
+        return batch.result(match.match_id)
+
+    async def form(match: MatchRecord, batch: ScoreBatch) -> Dict[str, Any]:
+        # Rolling form is omitted for a side whose latest applied result is not before the match
+        return {"home": {**team_form(index, match.home, match.start_time),
+                         "rolling": features.team(match.home, before=match.start_time)},
+                "away": {**team_form(index, match.away, match.start_time),
+                         "rolling": features.team(match.away, before=match.start_time)}}
+
+    async def h2h(match: MatchRecord, batch: ScoreBatch) -> Dict[str, Any]:
+        return head_to_head(index, match.home, match.away, match.start_time)
+
+    async def odds(match: MatchRecord, batch: ScoreBatch) -> Optional[Dict[str, Any]]:
+        return odds_movement(store, match.match_id)
+
+    async def outcomes(match: MatchRecord, batch: ScoreBatch) -> Optional[Dict[str, Any]]:
+        score = batch.result(match.match_id)
+        if score is None:
+            return None
+        # Simulated per rating checkpoint and score; repeat calls are cache hits
+        return await sim.simulate(match.match_id, match.league, score["ai_score"],
+                                  (batch.ratings_version, score["ai_score"]))
+
+    builder.register("schedule", schedule)
+    builder.register("ratings", ratings)
+    builder.register("form", form)
+    builder.register("head_to_head", h2h)
+    builder.register("odds", odds)
+    builder.register("outcomes", outcomes)
+    return builder
+
+
+# Global context builder
+context_builder = create_context_builder()
+
+
+if __name__ == "__main__":
+    # Fan-out vs sequential assembly, with simulated source latencies:
+    #   python -m core.context
+    import random
+
+    async def bench() -> None:
+        random.seed(22)
+        delays = {"schedule": 0.002, "ratings": 0.005, "form": 0.02, "head_to_head": 0.03,
+                  "odds": 0.04, "outcomes": 0.08}
+
+        def slow(delay: float) -> ContextSource:
+            async def source(*args: Any) -> float:
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                return delay
+            return source
+
+        builder = ContextBuilder(source_timeout=0.1, total_timeout=0.15)
+        for name, delay in delays.items():
+            builder.register(name, slow(delay))
+        runs = 20
+        started = time.perf_counter()
+        for _ in range(runs):
+            for name, delay in delays.items():
+                await slow(delay)()
+        sequential = (time.perf_counter() - started) / runs
+        started = time.perf_counter()
+        partial = 0
+        for _ in range(runs):
+            result = await builder.build()
+            partial += not result["complete"]
+        fan_out = (time.perf_counter() - started) / runs
+        stats = builder.get_stats()
+        print(f"📊 {len(delays)} sources, {runs} builds")
+        print(f"  sequential:  {sequential * 1000:7.1f}ms per context")
+        print(f"  fan-out:     {fan_out * 1000:7.1f}ms per context ({partial} partial, "
+              f"p95 {stats['latency']['p95_ms']}ms)")
+        for name, source in stats["sources"].items():
+            print(f"  {name:>13}: p50 {source['latency']['p50_ms']:6.1f}ms, p95 {source['latency']['p95_ms']:6.1f}ms, "
+                  f"{source['timeouts']} timeouts")
+
+    asyncio.run(bench())
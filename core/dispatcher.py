@@ -0,0 +1,356 @@
+"""
+AIBET Core Outbound Dispatcher
+Rate-limited, prioritized delivery of Telegram messages
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from telegram import Bot, CallbackQuery, Message
+from telegram.error import RetryAfter
+
+from .config import config
+
+
+logger = logging.getLogger(__name__)
+
+# Lower value is sent first
+PRIORITY_COMMAND = 0
+PRIORITY_BULK = 10
+
+
+class TokenBucket:
+    """Token bucket with reservations, so concurrent callers never overshoot"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Take one token; return how long to wait before using it"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def wait(self, now: float) -> float:
+        """How long until a token is available, without taking one"""
+        tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+
+class _Job:
+    """Queued outbound call"""
+
+    __slots__ = ("chat_id", "call", "future", "attempts", "chat_reserved")
+
+    def __init__(self, chat_id: Optional[int], call: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        self.chat_id = chat_id
+        self.call = call
+        self.future = future
+        self.attempts = 0
+        # Set once the job holds a per-chat send slot
+        self.chat_reserved = False
+
+
+class OutboundDispatcher:
+    """Send Telegram calls through global and per-chat token buckets
+
+    A job whose bucket is empty is parked on a timer and put back on the queue when its
+    slot comes up, so workers never sleep on one throttled chat while others wait.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        workers: int = 8,
+        max_retries: int = 3,
+        max_chat_buckets: int = 10000,
+    ):
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        # LRU of per-chat buckets; the least recently used one goes past the cap
+        self._chats: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._max_chat_buckets = max_chat_buckets
+        self._workers_count = max(1, workers)
+        self._max_retries = max_retries
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._deferred: Dict[int, Tuple[asyncio.TimerHandle, _Job]] = {}
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+
+        # Metrics
+        self._started_at: Optional[float] = None
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._throttled = 0
+        self._throttle_wait = 0.0
+
+    def start(self) -> None:
+        """Start delivery workers on the running event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._started_at = time.monotonic()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"outbound-worker-{i}")
+            for i in range(self._workers_count)
+        ]
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Deliver pending messages for up to `timeout` seconds, then stop workers"""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Outbound dispatcher stopped with "
+                           f"{self._queue.qsize() + len(self._deferred)} pending messages")
+        for handle, job in self._deferred.values():
+            handle.cancel()
+            if not job.future.done():
+                job.future.cancel()
+        self._deferred.clear()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _drain(self) -> None:
+        """Wait until both the queue and the parked jobs are empty"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._queue.join()
+            if not self._deferred:
+                return
+            earliest = min(handle.when() for handle, _ in self._deferred.values())
+            await asyncio.sleep(max(0.0, earliest - loop.time()))
+
+    def submit(
+        self,
+        chat_id: Optional[int],
+        call: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_COMMAND,
+    ) -> asyncio.Future:
+        """Queue a Bot API call; the future resolves with its result"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._seq), _Job(chat_id, call, future)))
+        return future
+
+    async def reply_text(self, message: Message, text: str, priority: int = PRIORITY_COMMAND, **kwargs: Any) -> Message:
+        """Rate-limited Message.reply_text"""
+        return await self.submit(message.chat_id, lambda: message.reply_text(text, **kwargs), priority)
+
+    async def edit_message_text(self, query: CallbackQuery, text: str, priority: int = PRIORITY_COMMAND, **kwargs: Any) -> Any:
+        """Rate-limited CallbackQuery.edit_message_text"""
+        chat_id = query.message.chat_id if query.message else None
+        return await self.submit(chat_id, lambda: query.edit_message_text(text, **kwargs), priority)
+
+    async def send_message(self, bot: Bot, chat_id: int, text: str, priority: int = PRIORITY_BULK, **kwargs: Any) -> Message:
+        """Rate-limited Bot.send_message, queued behind command replies by default"""
+        return await self.submit(chat_id, lambda: bot.send_message(chat_id, text, **kwargs), priority)
+
+    def _reserve(self, job: _Job) -> float:
+        """Take the job's send slot; return the delay before it may be sent (0 = send now)
+
+        The per-chat token is reserved once, fixing the job's place in its chat's sequence. The
+        global token is only taken when it is free, so parked jobs hold no global capacity.
+        """
+        now = time.monotonic()
+        if job.chat_id is not None and not job.chat_reserved:
+            bucket = self._chats.get(job.chat_id)
+            if bucket is None:
+                while len(self._chats) >= self._max_chat_buckets:
+                    self._chats.popitem(last=False)
+                bucket = self._chats[job.chat_id] = TokenBucket(self._chat_rate, self._chat_burst)
+            else:
+                self._chats.move_to_end(job.chat_id)
+            job.chat_reserved = True
+            delay = bucket.reserve(now)
+            if delay > 0:
+                return delay
+        delay = max(self._global.wait(now), self._paused_until - now)
+        if delay > 0:
+            return delay
+        self._global.reserve(now)
+        return 0.0
+
+    def _defer(self, priority: int, seq: int, job: _Job, delay: float) -> None:
+        """Park a job until `delay` seconds from now, then queue it again"""
+        self._throttled += 1
+        self._throttle_wait += delay
+        handle = asyncio.get_running_loop().call_later(delay, self._release, priority, seq, job)
+        self._deferred[seq] = (handle, job)
+
+    def _release(self, priority: int, seq: int, job: _Job) -> None:
+        """Put a parked job back on the queue; it keeps its priority and submission order"""
+        self._deferred.pop(seq, None)
+        self._queue.put_nowait((priority, seq, job))
+
+    async def _worker(self) -> None:
+        """Deliver queued calls within the rate limits"""
+        while True:
+            priority, seq, job = await self._queue.get()
+            try:
+                delay = self._reserve(job)
+                if delay > 0:
+                    self._defer(priority, seq, job, delay)
+                    continue
+                job.attempts += 1
+                result = await job.call()
+            except RetryAfter as e:
+                self._retried += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                logger.warning(f"⚠️ Flood control for chat {job.chat_id}, retry in {e.retry_after}s")
+                if job.attempts <= self._max_retries:
+                    # The retry takes a fresh per-chat slot
+                    job.chat_reserved = False
+                    self._queue.put_nowait((priority, seq, job))
+                else:
+                    self._failed += 1
+                    if not job.future.done():
+                        job.future.set_exception(e)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                self._failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self._sent += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get dispatcher statistics"""
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "workers": len(self._workers),
+            "depth": self._queue.qsize() if self._queue else 0,
+            "deferred": len(self._deferred),
+            "sent": self._sent,
+            "failed": self._failed,
+            "retried": self._retried,
+            "throttled": self._throttled,
+            "throttle_wait_s": round(self._throttle_wait, 3),
+            "sent_per_s": round(self._sent / uptime, 3) if uptime else 0.0,
+            "chat_buckets": len(self._chats),
+        }
+
+
+# Global dispatcher instance
+outbound = OutboundDispatcher(
+    global_rate=config.OUTBOUND_GLOBAL_RATE,
+    chat_rate=config.OUTBOUND_CHAT_RATE,
+    chat_burst=config.OUTBOUND_CHAT_BURST,
+    workers=config.OUTBOUND_WORKERS,
+)
+
+
+if __name__ == "__main__":
+    # Throughput benchmark against a local fake Bot API:
+    #   python -m core.dispatcher [messages] [chats]
+    import json
+    import sys
+
+    from telegram.request import BaseRequest
+
+    class FakeBotAPI(BaseRequest):
+        """In-process Bot API enforcing Telegram-like flood limits"""
+
+        def __init__(self, global_rate: float = 30.0, chat_interval: float = 1.0):
+            self.global_rate = global_rate
+            self.chat_interval = chat_interval
+            self.window: List[float] = []
+            self.last_by_chat: Dict[int, float] = {}
+            self.accepted = 0
+            self.rejected = 0
+
+        async def initialize(self) -> None:
+            pass
+
+        async def shutdown(self) -> None:
+            pass
+
+        async def do_request(self, url, method, request_data=None, **kwargs):
+            now = time.monotonic()
+            endpoint = url.rsplit("/", 1)[-1]
+            if endpoint == "getMe":
+                result = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+                return 200, json.dumps({"ok": True, "result": result}).encode()
+            chat_id = int(request_data.parameters["chat_id"])
+            self.window = [t for t in self.window if now - t < 1.0]
+            last = self.last_by_chat.get(chat_id)
+            if len(self.window) >= self.global_rate or (last is not None and now - last < self.chat_interval):
+                self.rejected += 1
+                body = {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                        "parameters": {"retry_after": 1}}
+                return 429, json.dumps(body).encode()
+            self.window.append(now)
+            self.last_by_chat[chat_id] = now
+            self.accepted += 1
+            result = {"message_id": self.accepted, "date": int(time.time()),
+                      "chat": {"id": chat_id, "type": "private"}, "text": request_data.parameters["text"]}
+            return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    async def send_burst(messages: int, chats: int, dispatcher: Optional[OutboundDispatcher]) -> None:
+        api = FakeBotAPI()
+        bot = Bot(token="123:fake", request=api)
+        await bot.initialize()
+        started = time.monotonic()
+        if dispatcher:
+            calls = [dispatcher.send_message(bot, i % chats + 1, "bench") for i in range(messages)]
+        else:
+            calls = [bot.send_message(i % chats + 1, "bench") for i in range(messages)]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        elapsed = time.monotonic() - started
+        errors = sum(isinstance(r, Exception) for r in results)
+        label = "dispatcher" if dispatcher else "direct"
+        print(f"{label:>10}: {messages} messages to {chats} chats in {elapsed:.2f}s, "
+              f"{errors} errors, fake API 429s: {api.rejected}")
+        if dispatcher:
+            await dispatcher.stop()
+            print(f"{'':>10}  {dispatcher.get_stats()}")
+
+    async def head_of_line(burst: int) -> None:
+        """A burst to one chat, then a command reply to another: the reply must not wait on the burst"""
+        api = FakeBotAPI()
+        bot = Bot(token="123:fake", request=api)
+        await bot.initialize()
+        dispatcher = OutboundDispatcher(chat_burst=1.0, workers=2)
+        bulk = [dispatcher.submit(1, lambda: bot.send_message(1, "bulk"), PRIORITY_BULK) for _ in range(burst)]
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        await dispatcher.submit(2, lambda: bot.send_message(2, "reply"), PRIORITY_COMMAND)
+        reply = time.monotonic() - started
+        for future in bulk:
+            future.cancel()
+        await dispatcher.stop(timeout=0)
+        print(f"{'hol':>10}: command reply to chat 2 after a {burst}-message burst to chat 1 "
+              f"sent in {reply * 1000:.0f}ms")
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+    chat_count = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    asyncio.run(send_burst(count, chat_count, None))
+    asyncio.run(send_burst(count, chat_count, OutboundDispatcher(chat_burst=1.0, max_retries=10)))
+    asyncio.run(head_of_line(20))
@@ -0,0 +1,294 @@
+"""
+AIBET Core Team Features
+Rolling per-team form in fixed-size NumPy ring buffers, updated once per finished match
+"""
+
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .config import config
+from .ingest import MatchRecord
+from .match_index import MatchIndex, match_index, team_key
+
+
+# Per-game stats, in buffer column order; a stat a league does not have is NaN and skipped
+STATS = ("goals_for", "goals_against", "shots_for", "shots_against", "map_win_rate")
+
+# Leagues whose score is maps won in a series rather than goals
+MAP_LEAGUES = {"cs2"}
+
+# Columns of one side in the bulk feature matrix
+TEAM_COLUMNS = tuple(f"{stat}_{kind}" for kind in ("mean", "ewma") for stat in STATS) + ("games",)
+
+# Columns of the bulk feature matrix: home side, then away side
+COLUMNS = tuple(f"home_{c}" for c in TEAM_COLUMNS) + tuple(f"away_{c}" for c in TEAM_COLUMNS)
+
+
+def game_stats(match: MatchRecord, home: bool) -> List[float]:
+    """One side's stats of a finished match, NaN where the league does not record them"""
+    scored, conceded = (match.home_score, match.away_score) if home else (match.away_score, match.home_score)
+    shots_for, shots_against = (match.home_shots, match.away_shots) if home else (match.away_shots, match.home_shots)
+    values = [math.nan] * len(STATS)
+    if match.league in MAP_LEAGUES:
+        if scored + conceded:
+            values[4] = scored / (scored + conceded)
+    else:
+        values[0], values[1] = float(scored), float(conceded)
+        if shots_for is not None and shots_against is not None:
+            values[2], values[3] = float(shots_for), float(shots_against)
+    return values
+
+
+class TeamFeatureStore:
+    """Last `window` games of every team in a ring buffer, with running sums and EWMAs beside it
+
+    A finished match overwrites the oldest slot of each side and adjusts the sums by the value
+    it replaced, so an update costs the same whatever the window. Features are the teams' form as
+    of their latest applied result; reads for a match are masked where that result is not older
+    than the match, so finished matches never see their own outcome.
+    """
+
+    def __init__(self, window: int = 10, alpha: float = 0.3, capacity: int = 256,
+                 index: Optional[MatchIndex] = None):
+        self.window = max(1, window)
+        self.alpha = alpha
+        self._index = index
+        self._rows: Dict[str, int] = {}
+        self._buffer = np.full((capacity, self.window, len(STATS)), np.nan)
+        self._head = np.zeros(capacity, dtype=np.int64)
+        self._sums = np.zeros((capacity, len(STATS)))
+        self._counts = np.zeros((capacity, len(STATS)))
+        self._ewma = np.full((capacity, len(STATS)), np.nan)
+        self._games = np.zeros(capacity)
+        # Match ids and start times of the ring slots, for dedup; bounded like the rings
+        self._ids: List[List[Optional[str]]] = [[None] * self.window for _ in range(capacity)]
+        self._times: List[List[float]] = [[math.inf] * self.window for _ in range(capacity)]
+        self._last_time = np.full(capacity, -np.inf)
+        # Bumped on every applied result
+        self.version = 0
+
+        # Metrics
+        self._updates = 0
+        self._update_total = 0.0
+        self._bulk_reads = 0
+        self._last_drift = 0.0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _row(self, team: str) -> int:
+        """Row of a team, allocated on first sight"""
+        key = team_key(team)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._rows)
+            if row >= len(self._head):
+                self._grow()
+        return row
+
+    def _grow(self) -> None:
+        """Double every per-team array"""
+        grow = len(self._head)
+        self._buffer = np.concatenate([self._buffer, np.full((grow, self.window, len(STATS)), np.nan)])
+        self._head = np.concatenate([self._head, np.zeros(grow, dtype=np.int64)])
+        self._sums = np.concatenate([self._sums, np.zeros((grow, len(STATS)))])
+        self._counts = np.concatenate([self._counts, np.zeros((grow, len(STATS)))])
+        self._ewma = np.concatenate([self._ewma, np.full((grow, len(STATS)), np.nan)])
+        self._games = np.concatenate([self._games, np.zeros(grow)])
+        self._ids.extend([None] * self.window for _ in range(grow))
+        self._times.extend([math.inf] * self.window for _ in range(grow))
+        self._last_time = np.concatenate([self._last_time, np.full(grow, -np.inf)])
+
+    def _push(self, row: int, match: MatchRecord, values: List[float]) -> None:
+        """Write one game into a team's ring and update its rolling stats in O(1)"""
+        head = int(self._head[row])
+        # Plain floats, written back once per row: per-element numpy access is the slow part
+        old = self._buffer[row, head].tolist()
+        sums = self._sums[row].tolist()
+        counts = self._counts[row].tolist()
+        ewma = self._ewma[row].tolist()
+        for i, value in enumerate(values):
+            if not math.isnan(old[i]):
+                sums[i] -= old[i]
+                counts[i] -= 1.0
+            if not math.isnan(value):
+                sums[i] += value
+                counts[i] += 1.0
+                ewma[i] = value if math.isnan(ewma[i]) else ewma[i] + self.alpha * (value - ewma[i])
+        self._buffer[row, head] = values
+        self._sums[row] = sums
+        self._counts[row] = counts
+        self._ewma[row] = ewma
+        self._ids[row][head] = match.match_id
+        self._times[row][head] = match.start_time
+        self._last_time[row] = max(float(self._last_time[row]), match.start_time)
+        self._head[row] = (head + 1) % self.window
+        self._games[row] += 1.0
+
+    def _seen(self, team: str, match: MatchRecord) -> bool:
+        """Whether a team's ring already holds the match, or a full ring only holds later games"""
+        row = self._rows.get(team_key(team))
+        if row is None:
+            return False
+        if match.match_id in self._ids[row]:
+            return True
+        # Fell out of the window (or never would be in it): applying it again would double count
+        return self._games[row] >= self.window and match.start_time < min(self._times[row])
+
+    def apply(self, match: MatchRecord) -> bool:
+        """Add one finished match to both teams; False if it has no result or was applied"""
+        if not match.has_result or self._seen(match.home, match) or self._seen(match.away, match):
+            return False
+        started = time.perf_counter()
+        home, away = self._row(match.home), self._row(match.away)
+        self._push(home, match, game_stats(match, True))
+        self._push(away, match, game_stats(match, False))
+        self.version += 1
+        self._updates += 1
+        self._update_total += time.perf_counter() - started
+        return True
+
+    def apply_matches(self, matches: Iterable[MatchRecord]) -> int:
+        """Apply new results in start order"""
+        return sum(self.apply(match) for match in sorted(
+            (m for m in matches if m.has_result), key=lambda m: (m.start_time, m.match_id)))
+
+    def team_matrix(self, teams: Sequence[str], before: Optional[np.ndarray] = None) -> np.ndarray:
+        """TEAM_COLUMNS of many teams in one gather
+
+        Unknown teams are NaN rows, and so are teams with a result starting at or after `before`.
+        """
+        rows = np.fromiter((self._rows.get(team_key(team), -1) for team in teams), dtype=np.int64,
+                           count=len(teams))
+        known = rows >= 0
+        rows = np.where(known, rows, 0)
+        if before is not None:
+            known &= self._last_time[rows] < before
+        counts = self._counts[rows]
+        means = np.divide(self._sums[rows], counts, out=np.full(counts.shape, np.nan), where=counts > 0)
+        matrix = np.hstack([means, self._ewma[rows], self._games[rows, None]])
+        matrix[~known] = np.nan
+        return matrix
+
+    def matrix(self, match_ids: Sequence[str]) -> np.ndarray:
+        """COLUMNS for many matches, one row each, as of each match's start
+
+        Matches not in the index are NaN rows; a side whose form already includes a result from
+        the match start on (e.g. the match itself) is NaN too.
+        """
+        self._bulk_reads += 1
+        homes: List[str] = []
+        aways: List[str] = []
+        starts = np.full(len(match_ids), -np.inf)
+        for i, match_id in enumerate(match_ids):
+            match = self._index.get(match_id) if self._index is not None else None
+            homes.append(match.home if match else "")
+            aways.append(match.away if match else "")
+            if match:
+                starts[i] = match.start_time
+        if not match_ids:
+            return np.empty((0, len(COLUMNS)))
+        return np.hstack([self.team_matrix(homes, starts), self.team_matrix(aways, starts)])
+
+    def team(self, team: str, before: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Rolling features of one team with the start of its latest game as "as_of"
+
+        None if it has no finished games, or if one of them starts at or after `before`.
+        """
+        row = self.team_matrix([team], None if before is None else np.array([before]))[0]
+        if np.isnan(row[-1]):
+            return None
+        features: Dict[str, Any] = {column: None if np.isnan(value) else round(float(value), 3)
+                                    for column, value in zip(TEAM_COLUMNS, row)}
+        last = float(self._last_time[self._rows[team_key(team)]])
+        features["as_of"] = datetime.fromtimestamp(last, timezone.utc).isoformat()
+        return features
+
+    def verify(self, tolerance: float = 1e-9) -> float:
+        """Cross-check the running sums against the ring contents; return the largest drift"""
+        size = len(self._rows)
+        buffer = self._buffer[:size]
+        counts = (~np.isnan(buffer)).sum(axis=1)
+        drift = float(np.max(np.abs(self._sums[:size] - np.nansum(buffer, axis=1)), initial=0.0))
+        self._last_drift = drift
+        if drift > tolerance or not np.array_equal(self._counts[:size], counts):
+            raise AssertionError(f"Rolling sums drifted from ring contents: {drift:.3e}")
+        return drift
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get feature store statistics"""
+        return {
+            "teams": len(self._rows),
+            "results": self._updates,
+            "version": self.version,
+            "window": self.window,
+            "alpha": self.alpha,
+            "bytes": self._buffer.nbytes + self._sums.nbytes + self._counts.nbytes + self._ewma.nbytes,
+            "update_avg_us": round(self._update_total / self._updates * 1e6, 3) if self._updates else 0.0,
+            "bulk_reads": self._bulk_reads,
+            "last_verify_drift": self._last_drift,
+        }
+
+
+# Global feature store, fed finished matches by the schedule cache
+team_features = TeamFeatureStore(config.FEATURE_WINDOW, config.FEATURE_EWMA_ALPHA, index=match_index)
+
+
+if __name__ == "__main__":
+    # Ring-buffer updates and bulk reads vs recomputing form from the match list:
+    #   python -m core.features [results]
+    import random
+    import sys
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    random.seed(25)
+    names = [f"Team {i}" for i in range(200)]
+    start = time.time() - count * 600
+    results = []
+    for i in range(count):
+        home, away = random.sample(names, 2)
+        league = random.choice(["nhl", "khl", "cs2"])
+        if league in MAP_LEAGUES:
+            scores = random.choice([(2, 0), (2, 1), (1, 2), (0, 2)])
+        else:
+            scores = (random.randint(0, 6), random.randint(0, 6))
+        results.append(MatchRecord(f"m:{i}", league, home, away, start + i * 600, status="finished",
+                                   home_score=scores[0], away_score=scores[1],
+                                   home_shots=random.randint(15, 45) if league == "nhl" else None,
+                                   away_shots=random.randint(15, 45) if league == "nhl" else None))
+    upcoming = [MatchRecord(f"u:{i}", "nhl", *random.sample(names, 2), time.time() + i * 600) for i in range(1000)]
+    index = MatchIndex()
+    index.replace_league("nhl", results + upcoming)
+
+    store = TeamFeatureStore(window=10, index=index)
+    started = time.perf_counter()
+    for match in results:
+        store.apply(match)
+    update = (time.perf_counter() - started) / count
+    drift = store.verify()
+    match_ids = [m.match_id for m in upcoming]
+    started = time.perf_counter()
+    matrix = store.matrix(match_ids)
+    bulk = time.perf_counter() - started
+
+    def recompute(team: str) -> np.ndarray:
+        """Window means from the team's match list, as a per-request scan would"""
+        games = [m for m in index.team(team) if m.has_result][-store.window:]
+        stats = np.array([game_stats(m, team_key(m.home) == team_key(team)) for m in games])
+        counts = (~np.isnan(stats)).sum(axis=0)
+        return np.divide(np.nansum(stats, axis=0), counts, out=np.full(len(STATS), np.nan), where=counts > 0)
+
+    started = time.perf_counter()
+    scanned = np.array([np.hstack([recompute(m.home), recompute(m.away)]) for m in upcoming])
+    scan = time.perf_counter() - started
+    means = matrix[:, [COLUMNS.index(f"{side}_{stat}_mean") for side in ("home", "away") for stat in STATS]]
+    same = np.allclose(means, scanned, equal_nan=True)
+    print(f"📊 {count} results, {len(store)} teams, window {store.window}, sum drift {drift:.1e}")
+    print(f"  ring-buffer update:             {update * 1e6:8.1f}us per result")
+    print(f"  bulk read, {len(match_ids)} matches:       {bulk * 1000:8.2f}ms ({matrix.shape[1]} columns)")
+    print(f"  recompute from match list:      {scan * 1000:8.2f}ms ({scan / bulk:.0f}x), "
+          f"same means: {'yes' if same else 'NO'}")
@@ -0,0 +1,511 @@
+"""
+AIBET Core Schedule Ingestion
+League adapters fetched concurrently over one pooled HTTP client
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from .config import config
+
+
+logger = logging.getLogger(__name__)
+
+# Normalized match states
+STATUS_SCHEDULED = "scheduled"
+STATUS_LIVE = "live"
+STATUS_FINISHED = "finished"
+
+# Upstream request: (url, query params, extra headers)
+SourceRequest = Tuple[str, Dict[str, Any], Dict[str, str]]
+
+# Conditional-request validators kept per upstream URL
+MAX_VALIDATORS = 256
+
+
+class MatchRecord:
+    """League-independent match, as every adapter emits it"""
+
+    __slots__ = ("match_id", "league", "home", "away", "start_time", "status", "venue", "tournament",
+                 "home_score", "away_score", "home_shots", "away_shots")
+
+    def __init__(
+        self,
+        match_id: str,
+        league: str,
+        home: str,
+        away: str,
+        start_time: float,
+        status: str = STATUS_SCHEDULED,
+        venue: Optional[str] = None,
+        tournament: Optional[str] = None,
+        home_score: Optional[int] = None,
+        away_score: Optional[int] = None,
+        home_shots: Optional[int] = None,
+        away_shots: Optional[int] = None,
+    ):
+        self.match_id = match_id
+        self.league = league
+        self.home = home
+        self.away = away
+        self.start_time = start_time
+        self.status = status
+        self.venue = venue
+        self.tournament = tournament
+        self.home_score = home_score
+        self.away_score = away_score
+        self.home_shots = home_shots
+        self.away_shots = away_shots
+
+    @property
+    def has_result(self) -> bool:
+        """Finished with a final score"""
+        return self.status == STATUS_FINISHED and self.home_score is not None and self.away_score is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready representation"""
+        return {
+            "match_id": self.match_id,
+            "league": self.league,
+            "home": self.home,
+            "away": self.away,
+            "start_time": datetime.fromtimestamp(self.start_time, timezone.utc).isoformat(),
+            "status": self.status,
+            "venue": self.venue,
+            "tournament": self.tournament,
+            "home_score": self.home_score,
+            "away_score": self.away_score,
+            "home_shots": self.home_shots,
+            "away_shots": self.away_shots,
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MatchRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"MatchRecord({self.match_id!r}, {self.home!r} vs {self.away!r})"
+
+
+def parse_timestamp(value: str) -> float:
+    """Epoch seconds from an ISO 8601 timestamp ending in Z or an offset"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class LeagueAdapter:
+    """Knows one upstream source: which requests to make and how to normalize them"""
+
+    league = ""
+    # Adapters with the same source share its concurrency limit
+    source = ""
+
+    def requests(self) -> List[SourceRequest]:
+        """Requests for one refresh; they are fetched concurrently"""
+        raise NotImplementedError
+
+    def parse(self, payload: Any) -> List[MatchRecord]:
+        """Normalize one decoded response body"""
+        raise NotImplementedError
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the adapter has what it needs (e.g. an API token)"""
+        return True
+
+
+class NHLAdapter(LeagueAdapter):
+    """NHL web API weekly schedule (api-web.nhle.com)"""
+
+    league = "nhl"
+    source = "nhle"
+
+    STATES = {"FUT": STATUS_SCHEDULED, "PRE": STATUS_SCHEDULED, "LIVE": STATUS_LIVE,
+              "CRIT": STATUS_LIVE, "FINAL": STATUS_FINISHED, "OFF": STATUS_FINISHED}
+
+    def __init__(self, base_url: str, weeks: int = 2):
+        self.base_url = base_url.rstrip("/")
+        self.weeks = max(1, weeks)
+
+    def requests(self) -> List[SourceRequest]:
+        """One request per schedule week"""
+        today = date.today()
+        return [(f"{self.base_url}/{today + timedelta(weeks=i)}", {}, {}) for i in range(self.weeks)]
+
+    def parse(self, payload: Any) -> List[MatchRecord]:
+        """Flatten gameWeek[].games[]"""
+        matches = []
+        for day in payload.get("gameWeek", []):
+            for game in day.get("games", []):
+                matches.append(MatchRecord(
+                    match_id=f"nhl:{game['id']}",
+                    league=self.league,
+                    home=self._team(game["homeTeam"]),
+                    away=self._team(game["awayTeam"]),
+                    start_time=parse_timestamp(game["startTimeUTC"]),
+                    status=self.STATES.get(game.get("gameState"), STATUS_SCHEDULED),
+                    venue=(game.get("venue") or {}).get("default"),
+                    home_score=game["homeTeam"].get("score"),
+                    away_score=game["awayTeam"].get("score"),
+                    home_shots=game["homeTeam"].get("sog"),
+                    away_shots=game["awayTeam"].get("sog"),
+                ))
+        return matches
+
+    @staticmethod
+    def _team(team: Dict[str, Any]) -> str:
+        place = (team.get("placeName") or {}).get("default")
+        name = (team.get("commonName") or {}).get("default")
+        return f"{place} {name}" if place and name else team.get("abbrev", "")
+
+
+class KHLAdapter(LeagueAdapter):
+    """KHL mobile events feed"""
+
+    league = "khl"
+    source = "khl"
+
+    STATES = {"not_yet_started": STATUS_SCHEDULED, "in_progress": STATUS_LIVE, "finished": STATUS_FINISHED}
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def requests(self) -> List[SourceRequest]:
+        """Upcoming events from the start of the current hour, so the URL stays cacheable"""
+        since = int(time.time()) // 3600 * 3600
+        return [(self.url, {"order_direction": "asc", "q[start_at_gt_time_from_unixtime]": since}, {})]
+
+    def parse(self, payload: Any) -> List[MatchRecord]:
+        """Events arrive as [{"event": {...}}]"""
+        matches = []
+        for item in payload:
+            event = item.get("event", item)
+            home_score, away_score = self._score(event.get("score"))
+            matches.append(MatchRecord(
+                match_id=f"khl:{event['id']}",
+                league=self.league,
+                home=event["team_a"]["name"],
+                away=event["team_b"]["name"],
+                start_time=event["start_at"] / 1000,
+                status=self.STATES.get(event.get("game_state_key"), STATUS_SCHEDULED),
+                venue=event.get("arena_name"),
+                home_score=home_score,
+                away_score=away_score,
+            ))
+        return matches
+
+    @staticmethod
+    def _score(score: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+        """Split a "3:2" score line"""
+        try:
+            home, away = (int(part) for part in score.split(":"))
+        except (AttributeError, ValueError):
+            return None, None
+        return home, away
+
+
+class CS2Adapter(LeagueAdapter):
+    """PandaScore upcoming CS2 matches, paged"""
+
+    league = "cs2"
+    source = "pandascore"
+
+    STATES = {"not_started": STATUS_SCHEDULED, "running": STATUS_LIVE, "finished": STATUS_FINISHED}
+
+    def __init__(self, url: str, token: Optional[str], pages: int = 2, per_page: int = 100):
+        self.url = url
+        self.token = token
+        self.pages = max(1, pages)
+        self.per_page = per_page
+
+    @property
+    def enabled(self) -> bool:
+        """PandaScore needs an API token"""
+        return bool(self.token)
+
+    def requests(self) -> List[SourceRequest]:
+        """Pages are independent, so all of them are requested at once"""
+        headers = {"Authorization": f"Bearer {self.token}"}
+        return [(self.url, {"page": page, "per_page": self.per_page}, headers) for page in range(1, self.pages + 1)]
+
+    def parse(self, payload: Any) -> List[MatchRecord]:
+        """Matches with both opponents known"""
+        matches = []
+        for match in payload:
+            opponents = [o["opponent"]["name"] for o in match.get("opponents", [])]
+            team_ids = [o["opponent"].get("id") for o in match.get("opponents", [])]
+            results = {r.get("team_id"): r.get("score") for r in match.get("results") or []}
+            start = match.get("begin_at") or match.get("scheduled_at")
+            if len(opponents) < 2 or not start:
+                continue
+            league = (match.get("league") or {}).get("name")
+            tournament = (match.get("tournament") or {}).get("name")
+            matches.append(MatchRecord(
+                match_id=f"cs2:{match['id']}",
+                league=self.league,
+                home=opponents[0],
+                away=opponents[1],
+                start_time=parse_timestamp(start),
+                status=self.STATES.get(match.get("status"), STATUS_SCHEDULED),
+                tournament=" ".join(part for part in (league, tournament) if part) or None,
+                home_score=results.get(team_ids[0]),
+                away_score=results.get(team_ids[1]),
+            ))
+        return matches
+
+
+class _SourceStats:
+    """Per-source request counters"""
+
+    __slots__ = ("requests", "errors", "not_modified", "in_flight", "max_in_flight", "latency_total", "latency_max")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+
+class _Validator:
+    """Last good response of one URL, for conditional re-fetching"""
+
+    __slots__ = ("etag", "last_modified", "payload")
+
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], payload: Any):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.payload = payload
+
+
+class IngestionEngine:
+    """Fetch league adapters over one shared connection pool, bounded per source"""
+
+    def __init__(
+        self,
+        adapters: Iterable[LeagueAdapter],
+        source_concurrency: int = 4,
+        max_connections: int = 20,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._adapters: Dict[str, LeagueAdapter] = {a.league: a for a in adapters}
+        self._source_concurrency = max(1, source_concurrency)
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, _SourceStats] = {}
+        self._validators: Dict[str, _Validator] = {}
+
+    @property
+    def leagues(self) -> List[str]:
+        """Registered league names"""
+        return list(self._adapters)
+
+    async def start(self) -> None:
+        """Open the shared HTTP client"""
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            limits=self._limits,
+            timeout=self._timeout,
+            transport=self._transport,
+            headers={"User-Agent": "AIBET/1.0 (educational analytics)"},
+        )
+        self._semaphores = {a.source: asyncio.Semaphore(self._source_concurrency) for a in self._adapters.values()}
+        logger.info(f"✅ Ingestion started: {', '.join(self._adapters)}")
+
+    async def stop(self) -> None:
+        """Close the shared HTTP client"""
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+
+    async def _get(self, adapter: LeagueAdapter, request: SourceRequest) -> Any:
+        """One conditional upstream GET under the source's concurrency limit"""
+        url, params, headers = request
+        key = str(httpx.URL(url, params=params))
+        validator = self._validators.get(key)
+        if validator:
+            headers = dict(headers)
+            if validator.etag:
+                headers["If-None-Match"] = validator.etag
+            if validator.last_modified:
+                headers["If-Modified-Since"] = validator.last_modified
+        stats = self._stats.setdefault(adapter.source, _SourceStats())
+        async with self._semaphores[adapter.source]:
+            stats.requests += 1
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            started = time.perf_counter()
+            try:
+                response = await self._client.get(url, params=params, headers=headers)
+                if response.status_code == 304 and validator:
+                    stats.not_modified += 1
+                    return validator.payload
+                response.raise_for_status()
+                payload = response.json()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if etag or last_modified:
+                    self._validators.pop(key, None)
+                    if len(self._validators) >= MAX_VALIDATORS:
+                        del self._validators[next(iter(self._validators))]
+                    self._validators[key] = _Validator(etag, last_modified, payload)
+                return payload
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                stats.in_flight -= 1
+                stats.latency_total += elapsed
+                stats.latency_max = max(stats.latency_max, elapsed)
+
+    async def fetch(self, league: str) -> List[MatchRecord]:
+        """Fetch and normalize one league, sorted by start time"""
+        adapter = self._adapters[league]
+        if not adapter.enabled:
+            return []
+        await self.start()
+        payloads = await asyncio.gather(*(self._get(adapter, r) for r in adapter.requests()))
+        matches: Dict[str, MatchRecord] = {}
+        for payload in payloads:
+            for match in adapter.parse(payload):
+                matches[match.match_id] = match
+        return sorted(matches.values(), key=lambda m: m.start_time)
+
+    async def fetch_all(self) -> Dict[str, List[MatchRecord]]:
+        """Fetch every league concurrently; a failing league yields an empty list"""
+        leagues = list(self._adapters)
+        results = await asyncio.gather(*(self.fetch(league) for league in leagues), return_exceptions=True)
+        fetched = {}
+        for league, result in zip(leagues, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Ingestion failed for {league}: {result!r}")
+                result = []
+            fetched[league] = result
+        return fetched
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-source request statistics"""
+        return {
+            source: {
+                "requests": s.requests,
+                "errors": s.errors,
+                "not_modified": s.not_modified,
+                "in_flight": s.in_flight,
+                "max_in_flight": s.max_in_flight,
+                "latency_avg_ms": round(s.latency_total / s.requests * 1000, 3) if s.requests else 0.0,
+                "latency_max_ms": round(s.latency_max * 1000, 3),
+            }
+            for source, s in self._stats.items()
+        }
+
+
+class FixtureTransport(httpx.AsyncBaseTransport):
+    """Local stand-in for upstream APIs, replaying recorded responses from <directory>/<host>.json"""
+
+    def __init__(self, directory: str, latency: float = 0.0):
+        self._directory = directory
+        self._latency = latency
+        self._fixtures: Dict[str, Dict[str, Any]] = {}
+        self.requests: List[httpx.Request] = []
+        # Set to simulate an upstream outage
+        self.down = False
+
+    def _fixture(self, host: str) -> Optional[Dict[str, Any]]:
+        if host not in self._fixtures:
+            path = os.path.join(self._directory, f"{host}.json")
+            if not os.path.exists(path):
+                return None
+            with open(path, encoding="utf-8") as f:
+                self._fixtures[host] = json.load(f)
+        return self._fixtures[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        if self.down:
+            return httpx.Response(503, json={"error": "upstream down"}, request=request)
+        fixture = self._fixture(request.url.host)
+        if fixture is None:
+            return httpx.Response(404, json={"error": f"no fixture for {request.url.host}"}, request=request)
+        headers = {k.lower(): v for k, v in fixture.get("headers", {}).items()}
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if (etag and request.headers.get("If-None-Match") == etag) or (
+                not etag and last_modified and request.headers.get("If-Modified-Since") == last_modified):
+            return httpx.Response(304, headers=headers, request=request)
+        return httpx.Response(
+            fixture.get("status", 200),
+            headers=fixture.get("headers", {}),
+            json=fixture["body"],
+            request=request,
+        )
+
+
+# Recorded upstream responses for offline runs
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def create_ingestion() -> IngestionEngine:
+    """Build the engine with the configured sources, or fixtures when INGEST_FIXTURES_DIR is set"""
+    transport = FixtureTransport(config.INGEST_FIXTURES_DIR) if config.INGEST_FIXTURES_DIR else None
+    adapters = [
+        NHLAdapter(config.NHL_SCHEDULE_URL, weeks=config.INGEST_WEEKS),
+        KHLAdapter(config.KHL_SCHEDULE_URL),
+        CS2Adapter(config.CS2_MATCHES_URL, config.PANDASCORE_TOKEN or ("fixture" if transport else None)),
+    ]
+    return IngestionEngine(
+        adapters,
+        source_concurrency=config.INGEST_SOURCE_CONCURRENCY,
+        max_connections=config.INGEST_MAX_CONNECTIONS,
+        timeout=config.INGEST_TIMEOUT,
+        transport=transport,
+    )
+
+
+# Global ingestion engine
+ingestion = create_ingestion()
+
+
+if __name__ == "__main__":
+    # Offline run against the recorded fixtures:
+    #   python -m core.ingest [latency_ms]
+    import sys
+
+    async def run_offline(latency: float) -> None:
+        transport = FixtureTransport(FIXTURES_DIR, latency=latency)
+        engine = IngestionEngine(
+            [NHLAdapter(config.NHL_SCHEDULE_URL, weeks=4), KHLAdapter(config.KHL_SCHEDULE_URL),
+             CS2Adapter(config.CS2_MATCHES_URL, "fixture", pages=4)],
+            source_concurrency=2,
+            transport=transport,
+        )
+        started = time.perf_counter()
+        fetched = await engine.fetch_all()
+        elapsed = time.perf_counter() - started
+        await engine.stop()
+        for league, matches in fetched.items():
+            print(f"{league:>4}: {len(matches)} matches" + (f", first {matches[0]}" if matches else ""))
+        print(f"📊 {len(transport.requests)} requests in {elapsed * 1000:.0f}ms "
+              f"({latency * 1000:.0f}ms simulated latency each)")
+        print(json.dumps(engine.get_stats(), indent=2))
+
+    asyncio.run(run_offline(float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 50.0 / 1000))
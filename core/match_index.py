@@ -0,0 +1,171 @@
+"""
+AIBET Core Match Index
+Matches by id, with sorted secondary indexes by league, team and date
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .ingest import MatchRecord
+
+
+# Secondary index entry; sorts by start time, then id
+IndexEntry = Tuple[float, str]
+
+
+def match_date(start_time: float) -> str:
+    """UTC calendar date of a start time, as YYYY-MM-DD"""
+    return datetime.fromtimestamp(start_time, timezone.utc).strftime("%Y-%m-%d")
+
+
+def team_key(team: str) -> str:
+    """Case-insensitive team index key"""
+    return team.strip().casefold()
+
+
+class MatchIndex:
+    """In-memory match store; every range query is a bisect on a sorted list
+
+    Index lists are replaced, never mutated, so a query iterator stays valid while a refresh lands.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, MatchRecord] = {}
+        self._by_league: Dict[str, List[IndexEntry]] = {}
+        self._by_team: Dict[str, List[IndexEntry]] = {}
+        self._by_date: Dict[str, List[IndexEntry]] = {}
+        self._versions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, match_id: str) -> Optional[MatchRecord]:
+        """Match by id"""
+        return self._by_id.get(match_id)
+
+    def version(self, leagues: Optional[Iterable[str]] = None) -> Tuple[int, ...]:
+        """Data version of some leagues (default: all); changes whenever their matches do"""
+        names = sorted(self._versions) if leagues is None else leagues
+        return tuple(self._versions.get(name, 0) for name in names)
+
+    @property
+    def leagues(self) -> List[str]:
+        """Leagues with indexed matches"""
+        return list(self._by_league)
+
+    @staticmethod
+    def _rebuild(index: Dict[str, List[IndexEntry]], removed: Dict[str, Set[str]],
+                 added: Dict[str, List[IndexEntry]]) -> None:
+        """Replace each touched list with a new one, so iterators over the old one stay valid"""
+        for key in removed.keys() | added.keys():
+            gone = removed.get(key, ())
+            entries = [entry for entry in index.get(key, ()) if entry[1] not in gone]
+            entries.extend(added.get(key, ()))
+            if entries:
+                entries.sort()
+                index[key] = entries
+            else:
+                index.pop(key, None)
+
+    def replace_league(self, league: str, matches: Iterable[MatchRecord]) -> bool:
+        """Swap in a fresh schedule for one league; return False if nothing changed"""
+        matches = sorted(matches, key=lambda m: (m.start_time, m.match_id))
+        current = self._by_league.get(league, [])
+        if len(current) == len(matches) and all(
+                self._by_id.get(match_id) == match for (_, match_id), match in zip(current, matches)):
+            return False
+        removed_teams: Dict[str, Set[str]] = defaultdict(set)
+        removed_dates: Dict[str, Set[str]] = defaultdict(set)
+        for _, match_id in self._by_league.pop(league, []):
+            match = self._by_id.pop(match_id)
+            removed_teams[team_key(match.home)].add(match_id)
+            removed_teams[team_key(match.away)].add(match_id)
+            removed_dates[match_date(match.start_time)].add(match_id)
+        league_entries = []
+        added_teams: Dict[str, List[IndexEntry]] = defaultdict(list)
+        added_dates: Dict[str, List[IndexEntry]] = defaultdict(list)
+        for match in matches:
+            entry = (match.start_time, match.match_id)
+            self._by_id[match.match_id] = match
+            league_entries.append(entry)
+            added_teams[team_key(match.home)].append(entry)
+            added_teams[team_key(match.away)].append(entry)
+            added_dates[match_date(match.start_time)].append(entry)
+        if league_entries:
+            self._by_league[league] = league_entries
+        self._rebuild(self._by_team, removed_teams, added_teams)
+        self._rebuild(self._by_date, removed_dates, added_dates)
+        self._versions[league] = self._versions.get(league, 0) + 1
+        return True
+
+    @staticmethod
+    def _slice(
+        entries: List[IndexEntry],
+        start: Optional[float],
+        end: Optional[float],
+        after: Optional[IndexEntry] = None,
+    ) -> Iterator[IndexEntry]:
+        """Entries with start <= start_time < end, past the `after` key, without copying"""
+        lo = bisect_left(entries, (start, "")) if start is not None else 0
+        if after is not None:
+            lo = max(lo, bisect_right(entries, after))
+        hi = bisect_left(entries, (end, "")) if end is not None else len(entries)
+        return (entries[i] for i in range(lo, hi))
+
+    def _records(self, entries: Iterable[IndexEntry]) -> Iterator[MatchRecord]:
+        """Resolve entries lazily; a match replaced meanwhile is skipped"""
+        by_id = self._by_id
+        for _, match_id in entries:
+            match = by_id.get(match_id)
+            if match is not None:
+                yield match
+
+    def league(
+        self,
+        league: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        after: Optional[IndexEntry] = None,
+    ) -> Iterator[MatchRecord]:
+        """One league's matches in a time range, by start time"""
+        return self._records(self._slice(self._by_league.get(league, []), start, end, after))
+
+    def team(
+        self,
+        team: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        after: Optional[IndexEntry] = None,
+    ) -> Iterator[MatchRecord]:
+        """A team's matches (home or away) in a time range, by start time"""
+        return self._records(self._slice(self._by_team.get(team_key(team), []), start, end, after))
+
+    def on_date(self, day: str, after: Optional[IndexEntry] = None) -> Iterator[MatchRecord]:
+        """Matches starting on a UTC date (YYYY-MM-DD), by start time"""
+        return self._records(self._slice(self._by_date.get(day, []), None, None, after))
+
+    def merged(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        leagues: Optional[Iterable[str]] = None,
+        after: Optional[IndexEntry] = None,
+    ) -> Iterator[MatchRecord]:
+        """K-way merge of the per-league sorted ranges into one stream by start time"""
+        names = list(self._by_league) if leagues is None else leagues
+        streams = [self._slice(self._by_league[name], start, end, after)
+                   for name in names if name in self._by_league]
+        return self._records(heapq.merge(*streams))
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get index statistics"""
+        stats = {"matches": len(self._by_id), "teams": len(self._by_team), "dates": len(self._by_date)}
+        stats.update({f"{league}_matches": len(entries) for league, entries in self._by_league.items()})
+        return stats
+
+
+# Global match index, fed by the schedule cache
+match_index = MatchIndex()
@@ -0,0 +1,335 @@
+"""
+AIBET Core Odds Store
+Columnar odds history per match and market, spilled to memory-mapped files under a budget
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import config
+
+
+logger = logging.getLogger(__name__)
+
+# (match_id, market)
+SeriesKey = Tuple[str, str]
+
+# Name prefix of the per-process spill subdirectories
+SPILL_PREFIX = "odds-spill-"
+
+
+class OddsSeries:
+    """One market's snapshots as columns
+
+    Timestamps are whole seconds, delta-encoded as uint32: element 0 holds the first epoch second
+    (fits until 2106) and every later element the gap to the one before, so a cumulative sum
+    decodes them. Prices are float32, one column per outcome.
+    """
+
+    __slots__ = ("outcomes", "deltas", "prices", "size", "last", "spilled")
+
+    def __init__(self, outcomes: Sequence[str], capacity: int = 64):
+        self.outcomes = tuple(outcomes)
+        self.deltas = np.zeros(capacity, dtype=np.uint32)
+        self.prices = np.zeros((capacity, len(self.outcomes)), dtype=np.float32)
+        self.size = 0
+        self.last = 0
+        self.spilled: Optional[str] = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Resident bytes; a spilled series is paged in by the OS on demand"""
+        return 0 if self.spilled else self.deltas.nbytes + self.prices.nbytes
+
+    def append(self, timestamp: int, row: Sequence[float]) -> None:
+        """Add one snapshot; timestamps must not go backwards"""
+        if self.size and timestamp < self.last:
+            raise ValueError(f"Snapshot at {timestamp} is older than the last one at {self.last}")
+        if self.spilled:
+            self._load()
+        if self.size == len(self.deltas):
+            self.deltas = np.concatenate([self.deltas, np.zeros_like(self.deltas)])
+            self.prices = np.concatenate([self.prices, np.zeros_like(self.prices)])
+        self.deltas[self.size] = timestamp - self.last if self.size else timestamp
+        self.prices[self.size] = row
+        self.size += 1
+        self.last = timestamp
+
+    def timestamps(self) -> np.ndarray:
+        """Decoded epoch seconds"""
+        return np.cumsum(self.deltas[:self.size], dtype=np.int64)
+
+    def slice(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, prices) with start <= timestamp < end"""
+        timestamps = self.timestamps()
+        lo = np.searchsorted(timestamps, start, "left") if start is not None else 0
+        hi = np.searchsorted(timestamps, end, "left") if end is not None else self.size
+        return timestamps[lo:hi], self.prices[lo:hi]
+
+    def latest(self) -> Tuple[int, np.ndarray]:
+        """Timestamp and prices of the last snapshot"""
+        return self.last, self.prices[self.size - 1]
+
+    def spill(self, path: str) -> int:
+        """Write the columns to `<path>.t.npy` / `<path>.p.npy` and map them back read-only"""
+        np.save(path + ".t.npy", self.deltas[:self.size])
+        np.save(path + ".p.npy", self.prices[:self.size])
+        freed = self.nbytes
+        self.deltas = np.load(path + ".t.npy", mmap_mode="r")
+        self.prices = np.load(path + ".p.npy", mmap_mode="r")
+        self.spilled = path
+        return freed
+
+    def _load(self) -> None:
+        """Copy a spilled series back into memory for appending"""
+        capacity = max(64, 2 * self.size)
+        deltas = np.zeros(capacity, dtype=np.uint32)
+        prices = np.zeros((capacity, len(self.outcomes)), dtype=np.float32)
+        deltas[:self.size] = self.deltas
+        prices[:self.size] = self.prices
+        path = self.spilled
+        self.deltas, self.prices, self.spilled = deltas, prices, None
+        for suffix in (".t.npy", ".p.npy"):
+            os.remove(path + suffix)
+
+
+def spill_name(match_id: str, market: str) -> str:
+    """File stem of a spilled series: readable ids plus a hash, so sanitized ids cannot collide"""
+    raw = f"{match_id}\0{market}"
+    digest = hashlib.blake2b(raw.encode(), digest_size=6).hexdigest()
+    return re.sub(r"[^\w.-]", "_", f"{match_id}.{market}") + "." + digest
+
+
+def downsample(timestamps: np.ndarray, prices: np.ndarray, bucket: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Last snapshot in each `bucket`-second window, stamped with the window start"""
+    if not len(timestamps):
+        return timestamps, prices
+    buckets = timestamps // bucket
+    last = np.flatnonzero(np.diff(buckets, append=buckets[-1] + 1))
+    return buckets[last] * bucket, prices[last]
+
+
+class OddsStore:
+    """Odds history of every match and market
+
+    When resident columns exceed the memory budget, the least recently updated series are
+    spilled to memory-mapped files in a scratch subdirectory the store creates under its
+    directory. Nothing else in that directory is touched.
+    """
+
+    def __init__(
+        self,
+        directory: str = "data/odds",
+        memory_budget: int = 64 * 1024 * 1024,
+        listeners: Sequence[Callable[[str, str, Dict[str, float]], None]] = (),
+    ):
+        self._directory = directory
+        self._memory_budget = memory_budget
+        self._listeners = list(listeners)
+        self._series: "OrderedDict[SeriesKey, OddsSeries]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._resident = 0
+        self._opened = False
+        self._spill_dir = ""
+
+        # Metrics
+        self._appends = 0
+        self._spills = 0
+        self._spilled_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def version(self, match_id: str) -> int:
+        """Snapshots recorded for a match; changes whenever its odds do"""
+        return self._versions.get(match_id, 0)
+
+    def _open(self) -> None:
+        """Create this process's spill subdirectory; remove spill files left by earlier ones"""
+        os.makedirs(self._directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(glob.escape(self._directory), SPILL_PREFIX + "*")):
+            for path in glob.glob(os.path.join(glob.escape(stale), "*.npy")):
+                os.remove(path)
+            try:
+                os.rmdir(stale)
+            except OSError:
+                logger.warning(f"⚠️ Leaving {stale}: it holds files the odds store did not write")
+        self._spill_dir = tempfile.mkdtemp(prefix=SPILL_PREFIX, dir=self._directory)
+        self._opened = True
+
+    def append(self, match_id: str, market: str, prices: Dict[str, float], timestamp: Optional[float] = None) -> None:
+        """Record one snapshot of a market and pass it on to the listeners"""
+        key = (match_id, market)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = OddsSeries(sorted(prices))
+            self._resident += series.nbytes
+        before = series.nbytes
+        series.append(int(timestamp if timestamp is not None else time.time()),
+                      [prices.get(outcome, np.nan) for outcome in series.outcomes])
+        self._series.move_to_end(key)
+        self._versions[match_id] = self._versions.get(match_id, 0) + 1
+        self._resident += series.nbytes - before
+        self._appends += 1
+        if self._resident > self._memory_budget:
+            self._spill()
+        for listener in self._listeners:
+            listener(match_id, market, prices)
+
+    def _spill(self) -> None:
+        """Spill the least recently updated series until resident columns fit the budget"""
+        if not self._opened:
+            self._open()
+        target = self._memory_budget // 2
+        for key, series in self._series.items():
+            if self._resident <= target:
+                break
+            if series.spilled or not series.size:
+                continue
+            path = os.path.join(self._spill_dir, spill_name(*key))
+            freed = series.spill(path)
+            self._resident -= freed
+            self._spills += 1
+            self._spilled_bytes += freed
+        logger.info(f"💾 Odds store spilled to {self._spill_dir}, {self._resident} bytes resident")
+
+    def history(
+        self,
+        match_id: str,
+        market: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        bucket: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Snapshots of one market in a time range, optionally downsampled to `bucket` seconds"""
+        series = self._series.get((match_id, market))
+        if series is None:
+            return None
+        timestamps, prices = series.slice(start, end)
+        if bucket:
+            timestamps, prices = downsample(timestamps, prices, bucket)
+        return {"outcomes": list(series.outcomes), "timestamps": timestamps.tolist(),
+                "prices": np.round(prices.astype(np.float64), 3).tolist()}
+
+    def latest(self, league: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Last snapshot of every market, optionally of one league"""
+        results = []
+        for (match_id, market), series in self._series.items():
+            if league is not None and not match_id.startswith(league + ":"):
+                continue
+            timestamp, prices = series.latest()
+            results.append({
+                "match_id": match_id,
+                "market": market,
+                "timestamp": timestamp,
+                "prices": {outcome: round(float(price), 3) for outcome, price in zip(series.outcomes, prices)},
+                "snapshots": len(series),
+            })
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get odds store statistics"""
+        snapshots = sum(len(series) for series in self._series.values())
+        return {
+            "series": len(self._series),
+            "snapshots": snapshots,
+            "appends": self._appends,
+            "resident_bytes": self._resident,
+            "spilled_series": sum(1 for series in self._series.values() if series.spilled),
+            "spills": self._spills,
+            "spilled_bytes": self._spilled_bytes,
+        }
+
+
+def _update_value_index(match_id: str, market: str, prices: Dict[str, float]) -> None:
+    """Re-rank the value signals of a market on each snapshot"""
+    from .value_index import value_index
+    value_index.update_odds(match_id, market, prices)
+
+
+# Global odds store; every snapshot also updates the value index
+odds_store = OddsStore(
+    directory=config.ODDS_SPILL_DIR,
+    memory_budget=config.ODDS_MEMORY_BUDGET,
+    listeners=[_update_value_index],
+)
+
+
+if __name__ == "__main__":
+    # Bytes per snapshot vs a list of dicts, and query times:
+    #   python -m core.odds_store [matches] [snapshots]
+    import random
+    import sys
+    import tempfile
+    import tracemalloc
+
+    matches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    snapshots = int(sys.argv[2]) if len(sys.argv) > 2 else 1440
+    random.seed(20)
+    start = int(time.time()) - snapshots * 60
+
+    def feed(append) -> None:
+        for m in range(matches):
+            home = random.uniform(1.5, 3.0)
+            for s in range(snapshots):
+                home = max(1.01, home + random.gauss(0, 0.01))
+                append(f"nhl:{m}", start + s * 60 + random.randint(0, 5), round(home, 2), round(4.0 - home, 2))
+
+    def measure(build) -> Tuple[int, float]:
+        # Timed untraced; tracemalloc slows allocation-heavy code several times over
+        started = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - started
+        tracemalloc.start()
+        keep = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del keep
+        return current, elapsed
+
+    def build_dicts() -> Dict[str, List[Dict[str, Any]]]:
+        history: Dict[str, List[Dict[str, Any]]] = {}
+        feed(lambda match_id, ts, home, away: history.setdefault(match_id, []).append(
+            {"timestamp": float(ts), "market": "moneyline", "home": home, "away": away}))
+        return history
+
+    def build_store(directory: str, budget: int) -> OddsStore:
+        store = OddsStore(directory, memory_budget=budget)
+        feed(lambda match_id, ts, home, away: store.append(match_id, "moneyline", {"home": home, "away": away}, ts))
+        return store
+
+    total = matches * snapshots
+    dict_bytes, dict_time = measure(build_dicts)
+    with tempfile.TemporaryDirectory() as directory:
+        store_bytes, store_time = measure(lambda: build_store(directory, 1 << 40))
+        store = build_store(directory, 4 * 1024 * 1024)
+        stats = store.get_stats()
+        key = f"nhl:{matches // 2}"
+        runs = 200
+        started = time.perf_counter()
+        for _ in range(runs):
+            store.history(key, "moneyline", start + 3600, start + 7200)
+        slice_time = (time.perf_counter() - started) / runs
+        started = time.perf_counter()
+        for _ in range(runs):
+            store.history(key, "moneyline", bucket=3600)
+        downsample_time = (time.perf_counter() - started) / runs
+    print(f"📊 {matches} matches x {snapshots} snapshots ({total} snapshots)")
+    print(f"  list of dicts:  {dict_bytes / total:7.1f} bytes/snapshot, append {dict_time / total * 1e6:5.2f}us")
+    print(f"  odds store:     {store_bytes / total:7.1f} bytes/snapshot, append {store_time / total * 1e6:5.2f}us "
+          f"({dict_bytes / store_bytes:.0f}x smaller)")
+    print(f"  with 4 MB budget: {stats['resident_bytes'] / 1e6:.1f} MB resident, "
+          f"{stats['spilled_series']} series memory-mapped")
+    print(f"  1h range slice (mmap): {slice_time * 1e6:7.1f}us, hourly downsample: {downsample_time * 1e6:7.1f}us")
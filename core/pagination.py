@@ -0,0 +1,136 @@
+"""
+AIBET Core Pagination
+Opaque keyset cursors and NDJSON streaming over match index iterators
+"""
+
+import base64
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from .ingest import MatchRecord
+from .match_index import IndexEntry
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Records encoded per streamed chunk
+NDJSON_CHUNK = 200
+
+
+def encode_cursor(match: MatchRecord) -> str:
+    """Opaque cursor pointing just past `match`"""
+    raw = json.dumps([match.start_time, match.match_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[IndexEntry]:
+    """Index key of a cursor; raises ValueError for a malformed one"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        start_time, match_id = json.loads(raw)
+        return float(start_time), str(match_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def paginate(records: Iterable[MatchRecord], limit: Optional[int]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of records as dicts, plus the cursor of the next page (None on the last)"""
+    if limit is None:
+        return [match.to_dict() for match in records], None
+    page = list(islice(records, limit + 1))
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return [match.to_dict() for match in page[:limit]], next_cursor
+
+
+def ndjson_lines(records: Iterable[MatchRecord], limit: Optional[int] = None) -> Iterator[bytes]:
+    """One JSON record per line, encoded in chunks as the iterator is consumed
+
+    With a limit, a final {"next_cursor": ...} line follows when more records remain.
+    """
+    records = iter(records)
+    remaining = limit
+    last = None
+    while remaining is None or remaining > 0:
+        size = NDJSON_CHUNK if remaining is None else min(NDJSON_CHUNK, remaining)
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        last = chunk[-1]
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield "".join(json.dumps(match.to_dict(), ensure_ascii=False) + "\n" for match in chunk).encode()
+    if next(records, None) is not None:
+        yield (json.dumps({"next_cursor": encode_cursor(last)}) + "\n").encode()
+
+
+def ndjson_response(records: Iterable[MatchRecord], limit: Optional[int] = None) -> StreamingResponse:
+    """Stream records as NDJSON without building the whole list"""
+    return StreamingResponse(ndjson_lines(records, limit), media_type=NDJSON_MEDIA_TYPE)
+
+
+if __name__ == "__main__":
+    # Peak memory and time to first byte on a synthetic 50k-match fixture:
+    #   python -m core.pagination [matches]
+    import asyncio
+    import random
+    import sys
+    import time
+    import tracemalloc
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from .match_index import MatchIndex
+
+    def build_index(count: int) -> MatchIndex:
+        random.seed(14)
+        index = MatchIndex()
+        teams = [f"Team {i}" for i in range(120)]
+        now = time.time()
+        per_league = count // 3
+        for league in ("nhl", "khl", "cs2"):
+            matches = [
+                MatchRecord(f"{league}:{i}", league, *random.sample(teams, 2), now + random.uniform(0, 3e7),
+                            venue=f"Arena {i % 40}", tournament="Regular season")
+                for i in range(per_league)
+            ]
+            index.replace_league(league, sorted(matches, key=lambda m: m.start_time))
+        return index
+
+    async def consume(respond) -> Tuple[float, float, int]:
+        started = time.perf_counter()
+        response = respond()
+        if not isinstance(response, StreamingResponse):
+            elapsed = time.perf_counter() - started
+            return elapsed, elapsed, len(response.body)
+        first_byte = None
+        size = 0
+        async for chunk in response.body_iterator:
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+        return first_byte, time.perf_counter() - started, size
+
+    async def measure(label: str, respond) -> None:
+        # Timed untraced; tracemalloc slows allocation-heavy code several times over
+        first_byte, total, size = await consume(respond)
+        tracemalloc.start()
+        await consume(respond)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:>18}: first byte {first_byte * 1000:8.1f}ms, total {total * 1000:8.1f}ms, "
+              f"peak {peak / 1e6:7.1f} MB, {size / 1e6:.1f} MB sent")
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    index = build_index(count)
+    print(f"📊 {len(index)} matches")
+    asyncio.run(measure("json (full)", lambda: JSONResponse(
+        jsonable_encoder({"success": True, "data": [m.to_dict() for m in index.merged()]}))))
+    asyncio.run(measure("json (limit 100)", lambda: JSONResponse(
+        {"success": True, "data": paginate(index.merged(), 100)[0]})))
+    asyncio.run(measure("ndjson (stream)", lambda: ndjson_response(index.merged())))
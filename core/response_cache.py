@@ -0,0 +1,126 @@
+"""
+AIBET Core Response Cache
+Pre-encoded JSON bodies with strong ETags, revalidated by data version
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+
+from .config import config
+
+
+class _CachedBody:
+    """Encoded response body and the data version it was built from"""
+
+    __slots__ = ("body", "etag", "version")
+
+    def __init__(self, body: bytes, etag: str, version: Hashable):
+        self.body = body
+        self.etag = etag
+        self.version = version
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode like FastAPI's JSONResponse"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong validator derived from the exact body bytes"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match check; uses weak comparison, as RFC 9110 requires for this header"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class ResponseCache:
+    """Serve GET routes from cached bytes; rebuild only when their data version changes"""
+
+    def __init__(self, max_entries: int = 1024, max_age: int = 15):
+        self._entries: "OrderedDict[str, _CachedBody]" = OrderedDict()
+        self._max_entries = max_entries
+        self._cache_control = f"public, max-age={max_age}"
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+        self._bytes_sent = 0
+        self._bytes_saved = 0
+        self._serialize_total = 0.0
+        self._serialize_max = 0.0
+
+    @staticmethod
+    def key(request: Request) -> str:
+        """Route and query, independent of parameter order"""
+        return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+    def respond(self, request: Request, version: Hashable, build: Callable[[], Any],
+                headers: Optional[Dict[str, str]] = None) -> Response:
+        """Cached body for this request, rebuilt by `build` if the version moved; 304 when the client has it
+
+        Values that change between requests without a new version (ages, clocks) belong in
+        `headers`, which are added to every response, not in the cached body.
+        """
+        key = self.key(request)
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self._hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self._misses += 1
+            started = time.perf_counter()
+            body = encode_json(build())
+            elapsed = time.perf_counter() - started
+            self._serialize_total += elapsed
+            self._serialize_max = max(self._serialize_max, elapsed)
+            entry = _CachedBody(body, strong_etag(body), version)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+        headers = {**(headers or {}), "ETag": entry.etag, "Cache-Control": self._cache_control}
+        if etag_matches(request.headers.get("If-None-Match"), entry.etag):
+            self._not_modified += 1
+            self._bytes_saved += len(entry.body)
+            return Response(status_code=304, headers=headers)
+        self._bytes_sent += len(entry.body)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def invalidate(self, prefix: str = "") -> int:
+        """Drop entries whose route starts with `prefix` (default: all)"""
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "entries": len(self._entries),
+            "cached_bytes": sum(len(entry.body) for entry in self._entries.values()),
+            "hits": self._hits,
+            "misses": self._misses,
+            "not_modified": self._not_modified,
+            "bytes_sent": self._bytes_sent,
+            "bytes_saved": self._bytes_saved,
+            "serialize_total_ms": round(self._serialize_total * 1000, 3),
+            "serialize_avg_ms": round(self._serialize_total / self._misses * 1000, 3) if self._misses else 0.0,
+            "serialize_max_ms": round(self._serialize_max * 1000, 3),
+        }
+
+
+# Global response cache
+response_cache = ResponseCache(max_entries=config.RESPONSE_CACHE_ENTRIES, max_age=config.RESPONSE_MAX_AGE)
@@ -0,0 +1,199 @@
+"""
+AIBET Core Routes
+Schedule and AI endpoints shared by every app entry point
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .coalesce import ai_requests
+from .context import context_builder
+from .ingest import ingestion
+from .match_index import match_index
+from .odds_store import odds_store
+from .pagination import decode_cursor, ndjson_response, paginate
+from .response_cache import response_cache
+from .schedule_cache import ScheduleUnavailable, schedule_cache
+from .scoring import MAX_BATCH_SIZE, scoring
+
+
+logger = logging.getLogger(__name__)
+
+# Included by main.py, app/main.py and api/main.py
+router = APIRouter()
+
+
+async def league_schedule(
+    request: Request,
+    league: str,
+    message: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: str = "json"
+):
+    """Serve one league from the schedule cache, a page at a time or as an NDJSON stream
+
+    JSON pages are served from the response cache until the league's data changes. The cached
+    body holds no clock values; the schedule's age goes out as X-Schedule-Age on every response.
+    """
+    try:
+        after = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        await schedule_cache.get(league)
+    except ScheduleUnavailable as e:
+        logger.error(f"❌ {league} schedule fetch failed: {e!r}")
+        raise HTTPException(status_code=502, detail=f"{league.upper()} schedule source unavailable")
+    if format == "ndjson":
+        return ndjson_response(match_index.league(league, after=after), limit)
+    
+    def build() -> dict:
+        data, next_cursor = paginate(match_index.league(league, after=after), limit)
+        return {
+            "success": True,
+            "data": data,
+            "next_cursor": next_cursor,
+            "message": message
+        }
+    
+    age = schedule_cache.age(league)
+    headers = {"X-Schedule-Age": f"{age:.1f}"} if age is not None else None
+    return response_cache.respond(request, match_index.version([league]), build, headers)
+
+
+@router.get("/v1/nhl/schedule")
+async def get_nhl_schedule(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """Get NHL schedule"""
+    return await league_schedule(request, "nhl", "NHL schedule service - educational analytics only", limit, cursor, format)
+
+
+@router.get("/v1/khl/schedule")
+async def get_khl_schedule(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """Get KHL schedule"""
+    return await league_schedule(request, "khl", "KHL schedule service - educational analytics only", limit, cursor, format)
+
+
+@router.get("/v1/cs2/upcoming")
+async def get_cs2_upcoming(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """Get CS2 upcoming matches"""
+    return await league_schedule(request, "cs2", "CS2 upcoming matches service - educational analytics only", limit, cursor, format)
+
+
+def response_time() -> Dict[str, str]:
+    """X-Timestamp header of one response; cached AI bodies carry no clock values"""
+    return {"X-Timestamp": datetime.utcnow().isoformat()}
+
+
+async def find_match(match_id: str) -> dict:
+    """Indexed match by id, or 404"""
+    match = await schedule_cache.find(match_id)
+    if match is None:
+        raise HTTPException(status_code=404, detail=f"Match {match_id} not found")
+    return match.to_dict()
+
+
+async def build_context(match_id: str) -> Tuple[Optional[Hashable], dict]:
+    """Context body and its data version; None for a partial context"""
+    match = await find_match(match_id)
+    batch = scoring.refresh()
+    context = await context_builder.build(match_index.get(match_id), batch)
+    body = {
+        "success": True,
+        "data": {
+            "match_id": match_id,
+            "match": match,
+            "context": context["sections"],
+            "complete": context["complete"],
+            "timed_out": context["timed_out"],
+            "failed": context["failed"],
+            "not_a_prediction": True,
+            "educational_purpose": True,
+            "message": "AI context service - educational analysis only"
+        }
+    }
+    if not context["complete"]:
+        return None, body
+    return (match_index.version([match["league"]]), batch.ratings_version, odds_store.version(match_id)), body
+
+
+@router.get("/v1/ai/context/{match_id}")
+async def get_ai_context(request: Request, match_id: str):
+    """Get AI context - educational version"""
+    # Concurrent requests for one match share a single build, errors included
+    version, body = await ai_requests.do("context", match_id, lambda: build_context(match_id),
+                                         cacheable=lambda result: result[0] is not None)
+    if version is None:
+        # Partial contexts are not cached, so the next request retries the slow sources
+        return JSONResponse(body, headers=response_time())
+    return response_cache.respond(request, version, lambda: body, response_time())
+
+
+class ScoreBatchRequest(BaseModel):
+    """Match ids to score in one call"""
+    match_ids: List[str]
+
+
+@router.post("/v1/ai/score/batch")
+async def get_ai_scores(body: ScoreBatchRequest):
+    """Get AI scores of many matches from one precomputed pass"""
+    if not 1 <= len(body.match_ids) <= MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"match_ids must hold 1 to {MAX_BATCH_SIZE} ids")
+    leagues = {match_id.partition(":")[0] for match_id in body.match_ids} & set(ingestion.leagues)
+    await schedule_cache.load(sorted(leagues))
+    scores = scoring.get_many(body.match_ids)
+    return {
+        "success": True,
+        "data": [{"match_id": match_id, **score} for match_id, score in scores.items()],
+        "missing": [match_id for match_id in body.match_ids if match_id not in scores],
+        "not_a_prediction": True,
+        "educational_purpose": True,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+async def build_score(match_id: str) -> Tuple[Hashable, dict]:
+    """Score body and the version of the batch it came from"""
+    match = await find_match(match_id)
+    # Score and version from one batch, so the body matches its ETag
+    batch = scoring.refresh()
+    score = batch.result(match_id)
+    return batch.version, {
+        "success": True,
+        "data": {
+            "match_id": match_id,
+            "match": match,
+            **score,
+            "not_a_prediction": True,
+            "educational_purpose": True,
+            "message": "AI scoring service - educational analysis only"
+        }
+    }
+
+
+@router.get("/v1/ai/score/{match_id}")
+async def get_ai_score(request: Request, match_id: str):
+    """Get AI score from the precomputed batch"""
+    # Concurrent requests for one match share a single computation, errors included
+    version, body = await ai_requests.do("score", match_id, lambda: build_score(match_id))
+    return response_cache.respond(request, version, lambda: body, response_time())
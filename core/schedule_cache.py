@@ -0,0 +1,193 @@
+"""
+AIBET Core Schedule Cache
+Stale-while-revalidate league schedules in front of the ingestion engine
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import config
+from .features import TeamFeatureStore, team_features
+from .ingest import IngestionEngine, MatchRecord, ingestion
+from .match_index import MatchIndex, match_index
+from .ratings import RatingEngine, ratings
+
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleUnavailable(Exception):
+    """No schedule younger than the hard TTL and upstream failed"""
+
+
+class _Entry:
+    """Last good schedule of one league"""
+
+    __slots__ = ("matches", "fetched_at", "failed_at")
+
+    def __init__(self, matches: List[MatchRecord], fetched_at: float):
+        self.matches = matches
+        self.fetched_at = fetched_at
+        self.failed_at = 0.0
+
+
+class ScheduleCache:
+    """Serve the last good schedule instantly; refresh in the background after the soft TTL"""
+
+    def __init__(
+        self,
+        engine: IngestionEngine,
+        soft_ttl: float = 300.0,
+        hard_ttl: float = 3600.0,
+        retry_interval: float = 30.0,
+        index: Optional[MatchIndex] = None,
+        ratings: Optional[RatingEngine] = None,
+        features: Optional[TeamFeatureStore] = None,
+    ):
+        self._engine = engine
+        self._index = index
+        self._ratings = ratings
+        self._features = features
+        self._soft_ttl = soft_ttl
+        self._hard_ttl = max(hard_ttl, soft_ttl)
+        self._retry_interval = retry_interval
+        self._entries: Dict[str, _Entry] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._refreshes = 0
+        self._refresh_errors = 0
+        self._refresh_total = 0.0
+        self._refresh_max = 0.0
+        self._refresh_last = 0.0
+
+    async def get(self, league: str) -> List[MatchRecord]:
+        """Schedule of one league, refreshed per the soft and hard TTLs"""
+        entry = self._entries.get(league)
+        now = time.monotonic()
+        if entry is not None:
+            age = now - entry.fetched_at
+            if age < self._soft_ttl:
+                self._hits += 1
+                return entry.matches
+            if age < self._hard_ttl:
+                self._stale += 1
+                if now - entry.failed_at >= self._retry_interval:
+                    self._refresh(league)
+                return entry.matches
+        self._misses += 1
+        try:
+            # Shielded so one cancelled request does not abort the refresh others wait on
+            return await asyncio.shield(self._refresh(league))
+        except Exception as e:
+            raise ScheduleUnavailable(f"{league} schedule unavailable: {e!r}") from e
+
+    def _refresh(self, league: str) -> asyncio.Task:
+        """Start a refresh of `league`, or join the one already running"""
+        task = self._refreshing.get(league)
+        if task is None:
+            task = asyncio.create_task(self._fetch(league), name=f"schedule-refresh-{league}")
+            self._refreshing[league] = task
+            task.add_done_callback(lambda t: self._refresh_done(league, t))
+        return task
+
+    def _refresh_done(self, league: str, task: asyncio.Task) -> None:
+        """Forget a finished refresh; background failures are already logged"""
+        self._refreshing.pop(league, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, league: str) -> List[MatchRecord]:
+        """Fetch one league upstream and store it as the last good copy"""
+        started = time.monotonic()
+        try:
+            matches = await self._engine.fetch(league)
+        except Exception as e:
+            self._refresh_errors += 1
+            entry = self._entries.get(league)
+            if entry is not None:
+                entry.failed_at = time.monotonic()
+                logger.warning(f"⚠️ {league} refresh failed, serving copy from "
+                               f"{time.monotonic() - entry.fetched_at:.0f}s ago: {e!r}")
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            self._refreshes += 1
+            self._refresh_total += elapsed
+            self._refresh_max = max(self._refresh_max, elapsed)
+            self._refresh_last = elapsed
+        self._entries[league] = _Entry(matches, time.monotonic())
+        if self._index is not None:
+            self._index.replace_league(league, matches)
+        if self._ratings is not None:
+            self._ratings.apply_matches(matches)
+        if self._features is not None:
+            self._features.apply_matches(matches)
+        return matches
+
+    async def load(self, leagues: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Bring leagues (default: all) up to date concurrently; report which are available"""
+        leagues = leagues if leagues is not None else self._engine.leagues
+        results = await asyncio.gather(*(self.get(league) for league in leagues), return_exceptions=True)
+        return {league: not isinstance(result, Exception) for league, result in zip(leagues, results)}
+
+    async def find(self, match_id: str) -> Optional[MatchRecord]:
+        """Look a match up in the index, loading its league (the id prefix) first"""
+        league = match_id.partition(":")[0]
+        if self._index is None or league not in self._engine.leagues:
+            return None
+        try:
+            await self.get(league)
+        except ScheduleUnavailable:
+            pass
+        return self._index.get(match_id)
+
+    def age(self, league: str) -> Optional[float]:
+        """Seconds since the cached copy of `league` was fetched"""
+        entry = self._entries.get(league)
+        return time.monotonic() - entry.fetched_at if entry else None
+
+    def invalidate(self, league: Optional[str] = None) -> None:
+        """Drop one league, or all, so the next get refetches"""
+        if league is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(league, None)
+
+    async def stop(self) -> None:
+        """Cancel refreshes in flight"""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "stale": self._stale,
+            "refreshes": self._refreshes,
+            "refresh_errors": self._refresh_errors,
+            "refreshing": len(self._refreshing),
+            "refresh_avg_ms": round(self._refresh_total / self._refreshes * 1000, 3) if self._refreshes else 0.0,
+            "refresh_max_ms": round(self._refresh_max * 1000, 3),
+            "refresh_last_ms": round(self._refresh_last * 1000, 3),
+            "age_s": {league: round(self.age(league), 1) for league in self._entries},
+        }
+
+
+# Global schedule cache
+schedule_cache = ScheduleCache(
+    ingestion,
+    soft_ttl=config.SCHEDULE_SOFT_TTL,
+    hard_ttl=config.SCHEDULE_HARD_TTL,
+    index=match_index,
+    ratings=ratings,
+    features=team_features,
+)
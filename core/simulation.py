@@ -0,0 +1,246 @@
+"""
+AIBET Core Simulation
+Vectorized Monte Carlo outcome distributions, spread over a process pool for large jobs
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .config import config
+
+
+# Bump when the simulation model changes, so cached distributions are dropped
+MODEL_VERSION = 1
+
+# Average goals per game, both teams together
+LEAGUE_GOALS = {"nhl": 6.1, "khl": 5.2}
+
+# How strongly the win probability's log-odds shift goals between the sides;
+# tuned so the simulated home win rate tracks the input probability
+GOAL_SPREAD = 0.22
+
+# Goal counts above this share the last histogram bin
+MAX_GOALS = 12
+
+# CS2 series length when the source does not say
+DEFAULT_BEST_OF = 3
+
+# Score lines reported per match
+TOP_SCORE_LINES = 5
+
+
+def goal_rates(league: str, home_win: float) -> Tuple[float, float]:
+    """Expected goals of each side for a home win probability"""
+    home_win = min(max(home_win, 1e-6), 1 - 1e-6)
+    shift = GOAL_SPREAD * math.log(home_win / (1 - home_win))
+    half = LEAGUE_GOALS.get(league, 5.5) / 2
+    return half * math.exp(shift), half * math.exp(-shift)
+
+
+def simulate_hockey(home_rate: float, away_rate: float, home_ot: float, trials: int,
+                    seed: np.random.SeedSequence) -> Tuple[np.ndarray, int]:
+    """Final-score histogram (home x away) and overtime count of `trials` games
+
+    Goals are Poisson per side; a tie after regulation goes to overtime and adds the winning goal.
+    """
+    rng = np.random.default_rng(seed)
+    home = rng.poisson(home_rate, trials)
+    away = rng.poisson(away_rate, trials)
+    tied = home == away
+    home_wins_ot = rng.random(trials) < home_ot
+    home += tied & home_wins_ot
+    away += tied & ~home_wins_ot
+    cells = np.minimum(home, MAX_GOALS) * (MAX_GOALS + 1) + np.minimum(away, MAX_GOALS)
+    histogram = np.bincount(cells, minlength=(MAX_GOALS + 1) ** 2).reshape(MAX_GOALS + 1, MAX_GOALS + 1)
+    return histogram, int(tied.sum())
+
+
+def simulate_series(map_win: float, best_of: int, trials: int, seed: np.random.SeedSequence) -> Tuple[np.ndarray, int]:
+    """Maps-won histogram (home x away) of `trials` best-of-N series; the count is always 0"""
+    rng = np.random.default_rng(seed)
+    needed = best_of // 2 + 1
+    wins = rng.random((trials, best_of)) < map_win
+    home_maps = np.cumsum(wins, axis=1)
+    away_maps = np.cumsum(~wins, axis=1)
+    # The series ends at the first map where either side reaches the target
+    last = np.argmax((home_maps == needed) | (away_maps == needed), axis=1)
+    rows = np.arange(trials)
+    cells = home_maps[rows, last] * (needed + 1) + away_maps[rows, last]
+    histogram = np.bincount(cells, minlength=(needed + 1) ** 2).reshape(needed + 1, needed + 1)
+    return histogram, 0
+
+
+def _run_chunk(kind: str, params: Tuple, trials: int, seed: np.random.SeedSequence) -> Tuple[np.ndarray, int]:
+    """One chunk of trials; module level so pool workers can unpickle it"""
+    if kind == "series":
+        return simulate_series(*params, trials, seed)
+    return simulate_hockey(*params, trials, seed)
+
+
+def match_seed(match_id: str, version: Hashable) -> np.random.SeedSequence:
+    """Seed derived from the match and model version, stable across processes and restarts"""
+    digest = hashlib.blake2b(f"{MODEL_VERSION}:{match_id}:{version!r}".encode(), digest_size=16).digest()
+    return np.random.SeedSequence(int.from_bytes(digest, "big"))
+
+
+def summarize(league: str, histogram: np.ndarray, overtime: int, trials: int) -> Dict[str, Any]:
+    """Outcome distribution fields for the context route"""
+    home, away = np.indices(histogram.shape)
+    probabilities = histogram / trials
+    summary: Dict[str, Any] = {
+        "trials": trials,
+        "home_win": round(float(probabilities[home > away].sum()), 4),
+        "away_win": round(float(probabilities[home < away].sum()), 4),
+    }
+    top = np.argsort(histogram, axis=None)[::-1][:TOP_SCORE_LINES]
+    lines = [{"score": f"{h}-{a}", "probability": round(float(probabilities[h, a]), 4)}
+             for h, a in zip(*np.unravel_index(top, histogram.shape)) if histogram[h, a]]
+    if league == "cs2":
+        summary["map_counts"] = lines
+    else:
+        summary["score_lines"] = lines
+        summary["overtime"] = round(overtime / trials, 4)
+        summary["expected_goals"] = [round(float((probabilities * home).sum()), 2),
+                                     round(float((probabilities * away).sum()), 2)]
+    return summary
+
+
+class Simulator:
+    """Monte Carlo outcome distributions, cached per match and model version
+
+    Jobs are cut into fixed-size chunks, each seeded from its own child SeedSequence, so results
+    depend only on the match and version, not on how many workers ran them. Jobs above one chunk
+    go to a process pool.
+    """
+
+    def __init__(self, trials: int = 20000, chunk_trials: int = 250000, workers: Optional[int] = None,
+                 cache_size: int = 4096):
+        self.trials = trials
+        self._chunk_trials = chunk_trials
+        self._workers = workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[Tuple[str, Hashable], Dict[str, Any]]" = OrderedDict()
+        self._cache_size = cache_size
+
+        # Metrics
+        self._runs = 0
+        self._hits = 0
+        self._pooled = 0
+        self._trials_run = 0
+        self._elapsed = 0.0
+
+    def _chunks(self, trials: int, seed: np.random.SeedSequence) -> List[Tuple[int, np.random.SeedSequence]]:
+        """Trial counts and child seeds of a job"""
+        count = max(1, math.ceil(trials / self._chunk_trials))
+        sizes = [trials // count + (i < trials % count) for i in range(count)]
+        # Explicit spawn keys: SeedSequence.spawn() would advance `seed` and change the next run
+        children = [np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (i,)) for i in range(count)]
+        return list(zip(sizes, children))
+
+    def run(self, kind: str, params: Tuple, trials: int, seed: np.random.SeedSequence) -> Tuple[np.ndarray, int]:
+        """Run a job in this process"""
+        results = [_run_chunk(kind, params, size, child) for size, child in self._chunks(trials, seed)]
+        return sum(r[0] for r in results), sum(r[1] for r in results)
+
+    async def run_async(self, kind: str, params: Tuple, trials: int,
+                        seed: np.random.SeedSequence) -> Tuple[np.ndarray, int]:
+        """Run a job off the event loop: in a thread for one chunk, else across the process pool"""
+        chunks = self._chunks(trials, seed)
+        if len(chunks) == 1 or self._workers == 1:
+            return await asyncio.to_thread(self.run, kind, params, trials, seed)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._workers)
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _run_chunk, kind, params, size, child) for size, child in chunks))
+        self._pooled += 1
+        return sum(r[0] for r in results), sum(r[1] for r in results)
+
+    @staticmethod
+    def job(league: str, home_win: float, best_of: int = DEFAULT_BEST_OF) -> Tuple[str, Tuple]:
+        """Simulation kind and parameters of a match"""
+        if league == "cs2":
+            return "series", (home_win, best_of)
+        return "hockey", (*goal_rates(league, home_win), home_win)
+
+    async def simulate(self, match_id: str, league: str, home_win: float, version: Hashable,
+                       trials: Optional[int] = None) -> Dict[str, Any]:
+        """Outcome distribution of one match at one model version"""
+        trials = trials or self.trials
+        key = (match_id, (version, trials))
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._hits += 1
+            self._cache.move_to_end(key)
+            return cached
+        started = time.perf_counter()
+        kind, params = self.job(league, home_win)
+        histogram, overtime = await self.run_async(kind, params, trials, match_seed(match_id, version))
+        summary = summarize(league, histogram, overtime, trials)
+        self._elapsed += time.perf_counter() - started
+        self._runs += 1
+        self._trials_run += trials
+        self._cache[key] = summary
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return summary
+
+    def stop(self) -> None:
+        """Shut the worker pool down"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get simulation statistics"""
+        return {
+            "runs": self._runs,
+            "cache_hits": self._hits,
+            "cached": len(self._cache),
+            "pooled_runs": self._pooled,
+            "workers": self._workers,
+            "trials": self._trials_run,
+            "sims_per_sec": round(self._trials_run / self._elapsed) if self._elapsed else 0,
+        }
+
+
+# Global simulator
+simulator = Simulator(trials=config.SIMULATION_TRIALS, workers=config.SIMULATION_WORKERS or None)
+
+
+if __name__ == "__main__":
+    # Simulations per second on one core vs all cores:
+    #   python -m core.simulation [trials]
+    import sys
+
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else 4000000
+    seed = match_seed("nhl:bench", 0)
+    for label, kind, params in (("hockey", *Simulator.job("nhl", 0.6)), ("cs2 bo3", *Simulator.job("cs2", 0.6))):
+        single = Simulator(workers=1)
+        started = time.perf_counter()
+        one, _ = single.run(kind, params, trials, seed)
+        one_core = time.perf_counter() - started
+
+        pooled = Simulator()
+
+        async def timed() -> Tuple[float, np.ndarray]:
+            # Warm the pool first, so worker start-up is not counted
+            await pooled.run_async(kind, params, pooled._chunk_trials * pooled._workers, seed)
+            started = time.perf_counter()
+            histogram, _ = await pooled.run_async(kind, params, trials, seed)
+            return time.perf_counter() - started, histogram
+
+        all_cores, histogram = asyncio.run(timed())
+        pooled.stop()
+        same = np.array_equal(one, histogram)
+        print(f"📊 {label}: {trials} trials, results {'identical' if same else 'DIFFER'}")
+        print(f"  1 core:                {trials / one_core / 1e6:8.2f}M sims/s")
+        print(f"  {pooled._workers:2d} cores (pool):       {trials / all_cores / 1e6:8.2f}M sims/s")
@@ -1,55 +1,417 @@
 """
 AIBET Core Storage
-Simple in-memory storage for Timeweb deployment
+In-memory storage with an optional persistent backend for Timeweb deployment
 """
 
-from typing import Dict, Any, Optional
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
 
+from .config import config
+
+
+logger = logging.getLogger(__name__)
+
+# Scope of keys set with Storage.set; user data is scoped by user_id
+GLOBAL_SCOPE = 0
+
+StorageKey = Tuple[int, str]
+
+
+class Record:
+    """Stored value with epoch timestamps; expires_at 0.0 means no TTL"""
+
+    __slots__ = ("value", "timestamp", "expires_at")
+
+    def __init__(self, value: Any, timestamp: float, expires_at: float = 0.0):
+        self.value = value
+        self.timestamp = timestamp
+        self.expires_at = expires_at
+
+    def expired(self, now: float) -> bool:
+        """Whether the TTL has passed"""
+        return 0.0 < self.expires_at <= now
+
+
+class StorageBackend:
+    """Persistent engine behind Storage"""
+
+    # Persist every write at once instead of batching them
+    write_through = False
+
+    def load(self, scope: int, key: str) -> Optional[Record]:
+        """Load one record"""
+        raise NotImplementedError
+
+    def write_batch(self, items: List[Tuple[StorageKey, Record]]) -> None:
+        """Persist a batch of records"""
+        raise NotImplementedError
+
+    def purge_expired(self, now: float) -> int:
+        """Delete records whose TTL has passed; return how many were deleted"""
+        return 0
+
+    def counts(self) -> Tuple[int, int]:
+        """Get (global keys, users) counts"""
+        raise NotImplementedError
+
+    def sync(self) -> None:
+        """Make written records durable"""
+
+    def close(self) -> None:
+        """Release backend resources"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend-specific statistics"""
+        return {}
+
 
 class Storage:
-    """Simple in-memory storage"""
-    
-    def __init__(self):
-        self._data: Dict[str, Any] = {}
-        self._users: Dict[int, Dict[str, Any]] = {}
-    
-    def set(self, key: str, value: Any) -> None:
-        """Set value by key"""
-        self._data[key] = {
-            "value": value,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-    
+    """In-memory storage with TTLs and LRU eviction, optionally a write-behind cache over a backend
+
+    Every operation runs under one lock, so incr, cas, get_many and set_many
+    are atomic across asyncio tasks and threads whatever the backend.
+
+    max_entries bounds this cache only. The log backend keeps its whole dataset in memory as
+    well, so with it memory grows with the number of stored keys.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[StorageBackend] = None,
+        max_entries: int = 100000,
+        default_ttl: float = 0.0,
+        sweep_interval: float = 60.0,
+        flush_interval: float = 1.0,
+        flush_batch: int = 500,
+    ):
+        self._backend = backend
+        self._max_entries = max_entries
+        self._default_ttl = default_ttl
+        self._sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+        self._next_purge = self._next_sweep
+        self._flush_interval = flush_interval
+        self._flush_batch = flush_batch
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+
+        # Without a backend the records are the data, otherwise a cache; both LRU-bounded
+        self._records: "OrderedDict[StorageKey, Record]" = OrderedDict()
+        self._user_keys: Dict[int, int] = {}
+        self._global_keys = 0
+
+        # Write-behind buffers
+        self._pending: Dict[StorageKey, Record] = {}
+        self._flushing: Dict[StorageKey, Record] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_stopping = False
+        self._flush_wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Metrics
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._flushes = 0
+        self._flushed = 0
+
+    def _read(self, k: StorageKey) -> Optional[Record]:
+        """Read a live record from cache, write-behind buffers or backend"""
+        now = time.time()
+        record = self._records.get(k)
+        if record is not None:
+            if record.expired(now):
+                self._drop(k)
+                self._expirations += 1
+                return None
+            self._records.move_to_end(k)
+            self._cache_hits += 1
+            return record
+        if not self._backend:
+            return None
+        self._cache_misses += 1
+        record = self._pending.get(k) or self._flushing.get(k) or self._backend.load(*k)
+        if record is None or record.expired(now):
+            return None
+        self._cache(k, record)
+        return record
+
+    def _drop(self, k: StorageKey) -> None:
+        """Remove a record from memory"""
+        del self._records[k]
+        if not self._backend:
+            self._uncount(k)
+
+    def _uncount(self, k: StorageKey) -> None:
+        """Update key counts for a removed in-memory record"""
+        scope = k[0]
+        if scope == GLOBAL_SCOPE:
+            self._global_keys -= 1
+            return
+        remaining = self._user_keys[scope] - 1
+        if remaining:
+            self._user_keys[scope] = remaining
+        else:
+            del self._user_keys[scope]
+
+    def _cache(self, k: StorageKey, record: Record) -> None:
+        """Put a record in memory, evicting the least recently used over max_entries"""
+        records = self._records
+        if k in records:
+            records.move_to_end(k)
+        elif not self._backend:
+            scope = k[0]
+            if scope == GLOBAL_SCOPE:
+                self._global_keys += 1
+            else:
+                self._user_keys[scope] = self._user_keys.get(scope, 0) + 1
+        records[k] = record
+        if len(records) > self._max_entries:
+            now = time.time()
+            while len(records) > self._max_entries:
+                old_k, old = records.popitem(last=False)
+                if not self._backend:
+                    self._uncount(old_k)
+                if old.expired(now):
+                    self._expirations += 1
+                else:
+                    self._evictions += 1
+
+    def purge_expired(self) -> int:
+        """Drop in-memory records whose TTL has passed; return how many were dropped"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, record in self._records.items() if record.expired(now)]
+            for k in expired:
+                self._drop(k)
+            self._expirations += len(expired)
+            self._next_sweep = now + self._sweep_interval
+        return len(expired)
+
+    def _write(self, k: StorageKey, value: Any, ttl: Optional[float], expires_at: Optional[float] = None) -> bool:
+        """Store a record and queue it for the backend; True means flush inline"""
+        now = time.time()
+        if expires_at is None:
+            if ttl is None:
+                ttl = self._default_ttl
+            expires_at = now + ttl if ttl > 0 else 0.0
+        record = Record(value, now, expires_at)
+        self._cache(k, record)
+        if now >= self._next_sweep:
+            self.purge_expired()
+        if not self._backend:
+            return False
+        self._pending[k] = record
+        if self._backend.write_through:
+            return True
+        if len(self._pending) < self._flush_batch:
+            return False
+        if not self._flush_task:
+            return True
+        if len(self._pending) == self._flush_batch:
+            self._loop.call_soon_threadsafe(self._flush_wakeup.set)
+        return False
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Set value by key, expiring after `ttl` seconds if given"""
+        with self._lock:
+            flush_now = self._write((GLOBAL_SCOPE, key), value, ttl)
+        if flush_now:
+            self.flush()
+
     def get(self, key: str, default: Any = None) -> Any:
         """Get value by key"""
-        if key in self._data:
-            return self._data[key]["value"]
-        return default
-    
-    def set_user_data(self, user_id: int, key: str, value: Any) -> None:
-        """Set user-specific data"""
-        if user_id not in self._users:
-            self._users[user_id] = {}
-        self._users[user_id][key] = {
-            "value": value,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-    
+        with self._lock:
+            record = self._read((GLOBAL_SCOPE, key))
+        return record.value if record is not None else default
+
+    def set_user_data(self, user_id: int, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Set user-specific data, expiring after `ttl` seconds if given"""
+        with self._lock:
+            flush_now = self._write((user_id, key), value, ttl)
+        if flush_now:
+            self.flush()
+
     def get_user_data(self, user_id: int, key: str, default: Any = None) -> Any:
         """Get user-specific data"""
-        if user_id in self._users and key in self._users[user_id]:
-            return self._users[user_id][key]["value"]
-        return default
-    
+        with self._lock:
+            record = self._read((user_id, key))
+        return record.value if record is not None else default
+
+    @staticmethod
+    def _scope(user_id: Optional[int]) -> int:
+        """Scope for a user_id, or the global scope"""
+        return GLOBAL_SCOPE if user_id is None else user_id
+
+    def incr(self, key: str, amount: Union[int, float] = 1, user_id: Optional[int] = None,
+             ttl: Optional[float] = None) -> Union[int, float]:
+        """Atomically add `amount` to a numeric value (missing counts as 0); return the new value"""
+        k = (self._scope(user_id), key)
+        with self._lock:
+            record = self._read(k)
+            current = record.value if record is not None else 0
+            if not isinstance(current, (int, float)) or isinstance(current, bool):
+                raise TypeError(f"Cannot increment non-numeric value for key {key!r}")
+            value = current + amount
+            # Keep an existing TTL unless a new one is given, so counters work as quota windows
+            expires_at = record.expires_at if record is not None and ttl is None else None
+            flush_now = self._write(k, value, ttl, expires_at)
+        if flush_now:
+            self.flush()
+        return value
+
+    def cas(self, key: str, expected: Any, value: Any, user_id: Optional[int] = None,
+            ttl: Optional[float] = None) -> bool:
+        """Atomically set `value` if the current value (None when missing) equals `expected`"""
+        k = (self._scope(user_id), key)
+        with self._lock:
+            record = self._read(k)
+            current = record.value if record is not None else None
+            if current != expected:
+                return False
+            flush_now = self._write(k, value, ttl)
+        if flush_now:
+            self.flush()
+        return True
+
+    def get_many(self, keys: Iterable[str], user_id: Optional[int] = None, default: Any = None) -> Dict[str, Any]:
+        """Read several keys as one consistent snapshot"""
+        scope = self._scope(user_id)
+        with self._lock:
+            records = {key: self._read((scope, key)) for key in keys}
+        return {key: record.value if record is not None else default for key, record in records.items()}
+
+    def set_many(self, values: Dict[str, Any], user_id: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        """Set several keys at once; readers and the backend see all of them or none"""
+        scope = self._scope(user_id)
+        flush_now = False
+        with self._lock:
+            for key, value in values.items():
+                flush_now = self._write((scope, key), value, ttl) or flush_now
+        if flush_now:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write pending records to the backend; return how many were written"""
+        if not self._backend:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+            try:
+                self._backend.write_batch(list(self._flushing.items()))
+                now = time.time()
+                if now >= self._next_purge:
+                    self._next_purge = now + self._sweep_interval
+                    self._backend.purge_expired(now)
+            except Exception as e:
+                logger.error(f"❌ Storage flush failed: {e}")
+                with self._lock:
+                    # Keep newer writes, retry the rest on the next flush
+                    self._flushing.update(self._pending)
+                    self._pending, self._flushing = self._flushing, {}
+                return 0
+            written = len(self._flushing)
+            with self._lock:
+                self._flushing = {}
+            self._flushes += 1
+            self._flushed += written
+            return written
+
+    async def start(self) -> None:
+        """Start the background flush task on the running event loop"""
+        if not self._backend or self._flush_task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._flush_stopping = False
+        self._flush_wakeup = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flush_loop(), name="storage-flush")
+
+    async def stop(self) -> None:
+        """Stop the background flush task and flush what is left"""
+        if self._flush_task:
+            # Wake the loop instead of cancelling it, so an in-flight flush completes
+            self._flush_stopping = True
+            self._flush_wakeup.set()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await asyncio.to_thread(self.flush)
+        if self._backend:
+            await asyncio.to_thread(self._backend.sync)
+
+    async def _flush_loop(self) -> None:
+        """Flush on a timer or when the batch threshold is reached"""
+        while not self._flush_stopping:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            await asyncio.to_thread(self.flush)
+
     def get_stats(self) -> Dict[str, Any]:
-        """Get storage statistics"""
-        return {
-            "total_keys": len(self._data),
-            "total_users": len(self._users),
+        """Get storage statistics without touching the disk
+
+        With a backend, key counts are those already persisted; up to `pending` writes lag behind.
+        """
+        if self._backend:
+            total_keys, total_users = self._backend.counts()
+        else:
+            total_keys, total_users = self._global_keys, len(self._user_keys)
+        stats = {
+            "total_keys": total_keys,
+            "total_users": total_users,
+            "entries": len(self._records),
+            "max_entries": self._max_entries,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
             "timestamp": datetime.utcnow().isoformat()
         }
+        if self._backend:
+            stats.update({
+                "backend": type(self._backend).__name__,
+                "cache_hits": self._cache_hits,
+                "cache_misses": self._cache_misses,
+                "pending": len(self._pending),
+                "flushes": self._flushes,
+                "flushed": self._flushed,
+                **self._backend.get_stats(),
+            })
+        return stats
+
+
+def create_storage() -> Storage:
+    """Create storage with the configured backend"""
+    backend_name = config.STORAGE_BACKEND.lower()
+    options = {
+        "max_entries": config.STORAGE_MAX_ENTRIES,
+        "default_ttl": config.STORAGE_DEFAULT_TTL,
+    }
+    if backend_name == "memory":
+        return Storage(**options)
+    if backend_name == "sqlite":
+        from .storage_sqlite import SQLiteBackend
+        backend = SQLiteBackend(config.STORAGE_PATH)
+    elif backend_name == "log":
+        from .storage_log import LogBackend
+        backend = LogBackend(config.STORAGE_LOG_DIR, fsync=config.STORAGE_FSYNC, compact_ops=config.STORAGE_COMPACT_OPS)
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {config.STORAGE_BACKEND}")
+    return Storage(
+        backend,
+        flush_interval=config.STORAGE_FLUSH_INTERVAL,
+        flush_batch=config.STORAGE_FLUSH_BATCH,
+        **options
+    )
 
 
 # Global storage instance
-storage = Storage()
+storage = create_storage()
@@ -0,0 +1,179 @@
+"""
+AIBET Core Storage Benchmarks
+Run with: python -m core.storage_bench [writes [count] | stress [tasks] | recovery [keys]]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from .storage import GLOBAL_SCOPE, Record, Storage
+from .storage_log import LogBackend
+from .storage_sqlite import SQLiteBackend
+
+
+def bench_writes(storage: Storage, count: int) -> float:
+    """Time `count` set_user_data calls spread over 1000 users; return writes per second"""
+    started = time.perf_counter()
+    for i in range(count):
+        storage.set_user_data(i % 1000, f"key{i % 50}", i)
+    storage.flush()
+    return count / (time.perf_counter() - started)
+
+
+async def bench_writes_async(storage: Storage, count: int) -> float:
+    """Same as bench_writes with the background flush task running"""
+    await storage.start()
+    started = time.perf_counter()
+    for i in range(count):
+        storage.set_user_data(i % 1000, f"key{i % 50}", i)
+        if i % 1000 == 0:
+            await asyncio.sleep(0)
+    await storage.stop()
+    return count / (time.perf_counter() - started)
+
+
+def run_writes(count: int) -> None:
+    """Compare write throughput of the in-memory and SQLite engines"""
+    print(f"📊 {count} writes")
+    rate = bench_writes(Storage(), count)
+    print(f"  memory:                 {rate:>12,.0f} writes/s")
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(SQLiteBackend(os.path.join(tmp, "sync.db")))
+        rate = bench_writes(storage, count)
+        print(f"  sqlite (inline flush):  {rate:>12,.0f} writes/s  {storage.get_stats()['flushes']} flushes")
+        storage = Storage(SQLiteBackend(os.path.join(tmp, "async.db")))
+        rate = asyncio.run(bench_writes_async(storage, count))
+        print(f"  sqlite (flush task):    {rate:>12,.0f} writes/s  {storage.get_stats()['flushes']} flushes")
+
+
+async def stress(storage: Storage, tasks: int, rounds: int, threads: int, cas_tasks: int = 50) -> bool:
+    """Hammer incr, cas and set_many from asyncio tasks and threads; check no update is lost"""
+    await storage.start()
+
+    async def incr_task() -> None:
+        for _ in range(rounds):
+            storage.incr("hits")
+            storage.incr("quota", user_id=42)
+            await asyncio.sleep(0)
+
+    async def cas_task() -> None:
+        for _ in range(rounds):
+            while True:
+                current = storage.get("cas_counter")
+                await asyncio.sleep(0)
+                if storage.cas("cas_counter", current, (current or 0) + 1):
+                    break
+
+    async def pair_task(i: int) -> None:
+        for j in range(rounds):
+            storage.set_many({"left": i * rounds + j, "right": i * rounds + j}, user_id=7)
+            pair = storage.get_many(["left", "right"], user_id=7)
+            if pair["left"] != pair["right"]:
+                raise AssertionError(f"Torn set_many: {pair}")
+            await asyncio.sleep(0)
+
+    def thread_task() -> None:
+        for _ in range(rounds * 10):
+            storage.incr("hits")
+
+    started = time.perf_counter()
+    coros = [incr_task() if i % 2 else pair_task(i) for i in range(tasks)]
+    coros += [cas_task() for _ in range(cas_tasks)]
+    coros += [asyncio.to_thread(thread_task) for _ in range(threads)]
+    await asyncio.gather(*coros)
+    await storage.stop()
+    elapsed = time.perf_counter() - started
+
+    incr_tasks = tasks // 2
+    expected = {
+        "hits": incr_tasks * rounds + threads * rounds * 10,
+        "quota": incr_tasks * rounds,
+        "cas_counter": cas_tasks * rounds,
+    }
+    actual = {
+        "hits": storage.get("hits"),
+        "quota": storage.get_user_data(42, "quota"),
+        "cas_counter": storage.get("cas_counter"),
+    }
+    ok = actual == expected
+    print(f"  {'OK  ' if ok else 'FAIL'} {type(storage._backend).__name__ if storage._backend else 'memory'}: "
+          f"{tasks + cas_tasks} tasks + {threads} threads in {elapsed:.2f}s, expected {expected}, got {actual}")
+    return ok
+
+
+def run_stress(tasks: int) -> bool:
+    """Run the concurrency stress check on the in-memory and persistent engines"""
+    print(f"🔨 Stress: {tasks} concurrent tasks")
+    ok = asyncio.run(stress(Storage(), tasks, rounds=20, threads=8))
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(SQLiteBackend(os.path.join(tmp, "stress.db")), max_entries=2)
+        ok = asyncio.run(stress(storage, tasks, rounds=20, threads=8)) and ok
+        # Persisted values must match too
+        reopened = Storage(SQLiteBackend(os.path.join(tmp, "stress.db")))
+        ok = reopened.get("hits") == storage.get("hits") and ok
+        storage = Storage(LogBackend(os.path.join(tmp, "log"), compact_ops=1000), max_entries=2)
+        ok = asyncio.run(stress(storage, tasks, rounds=20, threads=8)) and ok
+        reopened = Storage(LogBackend(os.path.join(tmp, "log")))
+        ok = reopened.get("hits") == storage.get("hits") and ok
+    return ok
+
+
+def run_recovery(keys: int, tail: int = 100000) -> None:
+    """Time log backend recovery from a snapshot of `keys` records plus a log tail"""
+    print(f"♻️  Recovery: {keys} keys")
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = LogBackend(tmp, fsync="shutdown", compact_ops=keys * 10)
+        now = time.time()
+        batch = []
+        for i in range(keys):
+            batch.append(((i % 50000 + 1, f"key{i // 50000}"), Record(i, now)))
+            if len(batch) == 50000:
+                backend.write_batch(batch)
+                batch = []
+        backend.write_batch(batch)
+        started = time.perf_counter()
+        backend.compact()
+        print(f"  snapshot write:        {time.perf_counter() - started:.2f}s "
+              f"({os.path.getsize(os.path.join(tmp, 'snapshot.jsonl')) / 1e6:.1f} MB)")
+        backend.write_batch([((i + 1, "tail"), Record(i, now)) for i in range(tail)])
+        backend.close()
+
+        started = time.perf_counter()
+        recovered = LogBackend(tmp)
+        elapsed = time.perf_counter() - started
+        total_keys, total_users = recovered.counts()
+        print(f"  snapshot + {tail} ops:  {elapsed:.2f}s, {(keys + tail) / elapsed:,.0f} records/s, "
+              f"{total_users} users recovered")
+        recovered.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Single-key batches across compaction boundaries: the batch that triggers a snapshot must survive
+        backend = LogBackend(tmp, fsync="shutdown", compact_ops=3)
+        written = [f"k{i}" for i in range(10)]
+        for i, key in enumerate(written):
+            backend.write_batch([((GLOBAL_SCOPE, key), Record(i, now))])
+        snapshots = backend.get_stats()["snapshots"]
+        backend.close()
+        recovered = LogBackend(tmp)
+        lost = [key for key in written if recovered.load(GLOBAL_SCOPE, key) is None]
+        recovered.close()
+        print(f"  across {snapshots} compactions: {len(written) - len(lost)}/{len(written)} keys recovered"
+              f"{', lost ' + ', '.join(lost) if lost else ''}")
+        if lost:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "writes"
+    if mode == "writes":
+        run_writes(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
+    elif mode == "recovery":
+        run_recovery(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+    elif mode == "stress":
+        sys.exit(0 if run_stress(int(sys.argv[2]) if len(sys.argv) > 2 else 3000) else 1)
+    else:
+        print(f"❌ Unknown mode: {mode}")
+        sys.exit(1)
@@ -0,0 +1,229 @@
+"""
+AIBET Core Log Storage Backend
+Append-only operation log compacted into snapshots, no database needed
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage import GLOBAL_SCOPE, Record, StorageBackend, StorageKey
+
+
+logger = logging.getLogger(__name__)
+
+# "always": fsync every write, "batch": fsync every write-behind flush, "shutdown": fsync on stop only
+FSYNC_POLICIES = ("always", "batch", "shutdown")
+
+# Log lines decoded per json.loads call during recovery
+REPLAY_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+class LogBackend(StorageBackend):
+    """Dataset kept in memory, made durable by an op log plus periodic snapshots
+
+    Every key lives in memory for the life of the process; STORAGE_MAX_ENTRIES does not cap it.
+    Use the SQLite backend when the dataset may outgrow memory.
+    """
+
+    def __init__(self, directory: str, fsync: str = "batch", compact_ops: int = 100000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._snapshot_path = os.path.join(directory, "snapshot.jsonl")
+        self._log_path = os.path.join(directory, "oplog.jsonl")
+        self._fsync = fsync
+        self._compact_ops = compact_ops
+        self._lock = threading.Lock()
+        self.write_through = fsync == "always"
+
+        self._data: Dict[StorageKey, Record] = {}
+        self._user_keys: Dict[int, int] = {}
+        self._global_keys = 0
+
+        started = time.perf_counter()
+        snapshot_records = self._replay(self._snapshot_path)
+        self._log_ops = self._replay(self._log_path)
+        # Key counts are rebuilt in one pass rather than per replayed op
+        scopes = Counter(scope for scope, _ in self._data)
+        self._global_keys = scopes.pop(GLOBAL_SCOPE, 0)
+        self._user_keys = dict(scopes)
+        self._recovery_seconds = time.perf_counter() - started
+        self._snapshots = 0
+        self._log = open(self._log_path, "a", encoding="utf-8")
+        logger.info(
+            f"✅ Log storage recovered {len(self._data)} keys from {directory} "
+            f"({snapshot_records} snapshot records + {self._log_ops} log ops) in {self._recovery_seconds:.2f}s"
+        )
+
+    def _put(self, k: StorageKey, record: Record) -> None:
+        """Apply a put to the in-memory dataset"""
+        if k not in self._data:
+            scope = k[0]
+            if scope == GLOBAL_SCOPE:
+                self._global_keys += 1
+            else:
+                self._user_keys[scope] = self._user_keys.get(scope, 0) + 1
+        self._data[k] = record
+
+    def _delete(self, k: StorageKey) -> None:
+        """Apply a delete to the in-memory dataset"""
+        if self._data.pop(k, None) is None:
+            return
+        scope = k[0]
+        if scope == GLOBAL_SCOPE:
+            self._global_keys -= 1
+        elif self._user_keys[scope] > 1:
+            self._user_keys[scope] -= 1
+        else:
+            del self._user_keys[scope]
+
+    def _replay(self, path: str) -> int:
+        """Apply every op in a file; a torn line from a crash is skipped"""
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        data = self._data
+        with open(path, encoding="utf-8") as f:
+            while True:
+                lines = f.readlines(REPLAY_CHUNK_BYTES)
+                if not lines:
+                    break
+                count += self._apply_lines(data, lines, path)
+        return count
+
+    @staticmethod
+    def _apply_lines(data: Dict[StorageKey, Record], lines: List[str], path: str) -> int:
+        """Decode a chunk of op lines in one call and apply them"""
+        try:
+            ops = json.loads("[" + ",".join(lines) + "]")
+        except ValueError:
+            ops = []
+            for line in lines:
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"⚠️ Skipping unreadable line in {path}")
+        for op in ops:
+            if len(op) == 2:
+                data.pop((op[0], op[1]), None)
+            else:
+                data[(op[0], op[1])] = Record(op[2], op[3], op[4])
+        return len(ops)
+
+    def _append(self, lines: List[str]) -> None:
+        """Append ops to the log and sync it per the fsync policy"""
+        if not lines:
+            return
+        self._log.write("\n".join(lines) + "\n")
+        self._log.flush()
+        if self._fsync != "shutdown":
+            os.fsync(self._log.fileno())
+        self._log_ops += len(lines)
+
+    def _maybe_compact(self) -> None:
+        """Snapshot once the log is long enough; only call after the logged ops are applied"""
+        if self._log_ops >= self._compact_ops and self._log_ops >= len(self._data):
+            self._compact()
+
+    def load(self, scope: int, key: str) -> Optional[Record]:
+        """Load one record"""
+        return self._data.get((scope, key))
+
+    def write_batch(self, items: List[Tuple[StorageKey, Record]]) -> None:
+        """Log and apply a batch of records"""
+        lines = []
+        applied = []
+        for k, record in items:
+            try:
+                lines.append(json.dumps([k[0], k[1], record.value, record.timestamp, record.expires_at],
+                                        ensure_ascii=False))
+            except (TypeError, ValueError) as e:
+                logger.error(f"❌ Cannot persist key {k[1]!r}: {e}")
+                continue
+            applied.append((k, record))
+        with self._lock:
+            self._append(lines)
+            for k, record in applied:
+                self._put(k, record)
+            self._maybe_compact()
+
+    def purge_expired(self, now: float) -> int:
+        """Log deletes for records whose TTL has passed"""
+        with self._lock:
+            expired = [k for k, record in self._data.items() if record.expired(now)]
+            self._append([json.dumps([k[0], k[1]], ensure_ascii=False) for k in expired])
+            for k in expired:
+                self._delete(k)
+            self._maybe_compact()
+        return len(expired)
+
+    def _compact(self) -> None:
+        """Write a snapshot of the dataset, then start an empty log"""
+        started = time.perf_counter()
+        now = time.time()
+        tmp_path = self._snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for (scope, key), record in self._data.items():
+                if not record.expired(now):
+                    f.write(json.dumps([scope, key, record.value, record.timestamp, record.expires_at],
+                                       ensure_ascii=False))
+                    f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+        self._fsync_directory()
+        # Ops already in the snapshot; replaying them again would be harmless
+        self._log.close()
+        self._log = open(self._log_path, "w", encoding="utf-8")
+        os.fsync(self._log.fileno())
+        self._log_ops = 0
+        self._snapshots += 1
+        logger.info(f"✅ Storage snapshot of {len(self._data)} keys written in {time.perf_counter() - started:.2f}s")
+
+    def _fsync_directory(self) -> None:
+        """Make a rename in the data directory durable"""
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self._directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def compact(self) -> None:
+        """Force a snapshot"""
+        with self._lock:
+            self._compact()
+
+    def counts(self) -> Tuple[int, int]:
+        """Get (global keys, users) counts"""
+        return self._global_keys, len(self._user_keys)
+
+    def sync(self) -> None:
+        """Flush and fsync the log"""
+        with self._lock:
+            if self._log.closed:
+                return
+            self._log.flush()
+            os.fsync(self._log.fileno())
+
+    def close(self) -> None:
+        """Sync and close the log"""
+        self.sync()
+        with self._lock:
+            self._log.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get log statistics"""
+        return {
+            "fsync": self._fsync,
+            "log_ops": self._log_ops,
+            "snapshots": self._snapshots,
+            "recovery_seconds": round(self._recovery_seconds, 3),
+        }
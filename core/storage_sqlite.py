@@ -0,0 +1,119 @@
+"""
+AIBET Core SQLite Storage Backend
+Local SQLite file in WAL mode behind core.storage.Storage
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .storage import GLOBAL_SCOPE, Record, StorageBackend, StorageKey
+
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite backend with JSON-encoded values
+
+    Key counts are loaded once at open and kept up to date by the writes, so counts() never
+    queries the database.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " scope INTEGER NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " updated REAL NOT NULL,"
+            " expires REAL,"
+            " PRIMARY KEY (scope, key)"
+            ") WITHOUT ROWID"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(kv)")]
+        if "expires" not in columns:
+            self._conn.execute("ALTER TABLE kv ADD COLUMN expires REAL")
+        self._global_keys = 0
+        self._user_keys: Dict[int, int] = {}
+        for scope, count in self._conn.execute("SELECT scope, COUNT(*) FROM kv GROUP BY scope"):
+            if scope == GLOBAL_SCOPE:
+                self._global_keys = count
+            else:
+                self._user_keys[scope] = count
+        logger.info(f"✅ SQLite storage opened: {path}")
+
+    def load(self, scope: int, key: str) -> Optional[Record]:
+        """Load one record"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, updated, expires FROM kv WHERE scope = ? AND key = ?", (scope, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return Record(json.loads(row[0]), row[1], row[2] or 0.0)
+
+    def write_batch(self, items: List[Tuple[StorageKey, Record]]) -> None:
+        """Upsert a batch of records in one transaction"""
+        rows = []
+        for (scope, key), record in items:
+            try:
+                rows.append((scope, key, json.dumps(record.value), record.timestamp, record.expires_at or None))
+            except (TypeError, ValueError) as e:
+                logger.error(f"❌ Cannot persist key {key!r}: {e}")
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # Keys new to the table, looked up before the upsert for the in-memory counts
+                added = [row[0] for row in rows if self._conn.execute(
+                    "SELECT 1 FROM kv WHERE scope = ? AND key = ?", row[:2]).fetchone() is None]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO kv (scope, key, value, updated, expires) VALUES (?, ?, ?, ?, ?)", rows
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            for scope in added:
+                if scope == GLOBAL_SCOPE:
+                    self._global_keys += 1
+                else:
+                    self._user_keys[scope] = self._user_keys.get(scope, 0) + 1
+
+    def purge_expired(self, now: float) -> int:
+        """Delete records whose TTL has passed"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                expired = self._conn.execute(
+                    "SELECT scope, COUNT(*) FROM kv WHERE expires <= ? GROUP BY scope", (now,)
+                ).fetchall()
+                deleted = self._conn.execute("DELETE FROM kv WHERE expires <= ?", (now,)).rowcount
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            for scope, count in expired:
+                if scope == GLOBAL_SCOPE:
+                    self._global_keys -= count
+                elif self._user_keys.get(scope, 0) > count:
+                    self._user_keys[scope] -= count
+                else:
+                    self._user_keys.pop(scope, None)
+        return deleted
+
+    def counts(self) -> Tuple[int, int]:
+        """Get (global keys, users) counts from memory; no query, no lock"""
+        return self._global_keys, len(self._user_keys)
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,101 @@
+"""
+AIBET Core Reply Templates
+Reply texts rendered and Markdown-checked once at startup
+"""
+
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram.helpers import escape_markdown
+
+
+def check_markdown(text: str) -> None:
+    """Raise ValueError if text is not valid Telegram (legacy) Markdown"""
+    i = 0
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char == "\\":
+            i += 2
+            continue
+        if text.startswith("```", i):
+            end = text.find("```", i + 3)
+            closer = "```"
+        elif char in "*_`":
+            end = text.find(char, i + 1)
+            closer = char
+        elif char == "[":
+            close = text.find("]", i + 1)
+            end = text.find(")", close + 2) if close >= 0 and text[close + 1:close + 2] == "(" else -1
+            closer = ")"
+        else:
+            i += 1
+            continue
+        if end < 0:
+            line = text.count("\n", 0, i) + 1
+            raise ValueError(f"Unclosed Markdown entity '{char}' at line {line}")
+        i = end + len(closer)
+
+
+class ReplyTemplate:
+    """Reply text with static parts pre-rendered and dynamic fields left open"""
+
+    __slots__ = ("name", "_chunks", "_fields", "_text")
+
+    def __init__(self, name: str, body: str, static: Dict[str, Any]):
+        self.name = name
+        self._chunks: List[Tuple[str, Optional[str]]] = []
+        literal = []
+        for text, field, spec, conversion in Formatter().parse(body):
+            literal.append(text)
+            if field is None:
+                continue
+            if field in static:
+                literal.append(format(static[field], spec or ""))
+            else:
+                self._chunks.append(("".join(literal), field))
+                literal = []
+        self._chunks.append(("".join(literal), None))
+        self._fields = frozenset(field for _, field in self._chunks if field)
+        # Fully static templates are a single ready string
+        self._text = self._chunks[0][0] if not self._fields else None
+        check_markdown(self.render(**{field: "0" for field in self._fields}))
+
+    @property
+    def fields(self) -> frozenset:
+        """Dynamic field names"""
+        return self._fields
+
+    def render(self, **values: Any) -> str:
+        """Fill dynamic fields, escaping their values for Markdown"""
+        if self._text is not None:
+            return self._text
+        parts = []
+        for text, field in self._chunks:
+            parts.append(text)
+            if field is not None:
+                parts.append(escape_markdown(str(values[field])))
+        return "".join(parts)
+
+
+class TemplateRegistry:
+    """Named reply templates, validated at registration"""
+
+    def __init__(self):
+        self._templates: Dict[str, ReplyTemplate] = {}
+
+    def register(self, name: str, body: str, **static: Any) -> ReplyTemplate:
+        """Pre-render a template; broken Markdown raises ValueError here, not at reply time"""
+        try:
+            template = ReplyTemplate(name, body, static)
+        except ValueError as e:
+            raise ValueError(f"Template '{name}': {e}") from e
+        self._templates[name] = template
+        return template
+
+    def render(self, name: str, **values: Any) -> str:
+        """Render a registered template"""
+        return self._templates[name].render(**values)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
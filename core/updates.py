@@ -0,0 +1,111 @@
+"""
+AIBET Core Update Filtering
+Derive allowed_updates from registered handlers and pre-filter raw updates
+"""
+
+from typing import Any, Dict, Iterable, List
+
+from telegram import Update
+from telegram.ext import (
+    Application,
+    CallbackQueryHandler,
+    ChatJoinRequestHandler,
+    ChatMemberHandler,
+    ChosenInlineResultHandler,
+    CommandHandler,
+    InlineQueryHandler,
+    MessageHandler,
+    PollAnswerHandler,
+    PollHandler,
+    PreCheckoutQueryHandler,
+    ShippingQueryHandler,
+    filters,
+)
+
+
+# Update types reached by handlers that do not filter on update type
+HANDLER_UPDATE_TYPES = {
+    CallbackQueryHandler: [Update.CALLBACK_QUERY],
+    ChatJoinRequestHandler: [Update.CHAT_JOIN_REQUEST],
+    ChosenInlineResultHandler: [Update.CHOSEN_INLINE_RESULT],
+    InlineQueryHandler: [Update.INLINE_QUERY],
+    PollAnswerHandler: [Update.POLL_ANSWER],
+    PollHandler: [Update.POLL],
+    PreCheckoutQueryHandler: [Update.PRE_CHECKOUT_QUERY],
+    ShippingQueryHandler: [Update.SHIPPING_QUERY],
+}
+
+# Update types reached by message-based handlers, by their update type filter
+FILTER_UPDATE_TYPES = {
+    filters.UpdateType.MESSAGE: [Update.MESSAGE],
+    filters.UpdateType.EDITED_MESSAGE: [Update.EDITED_MESSAGE],
+    filters.UpdateType.MESSAGES: [Update.MESSAGE, Update.EDITED_MESSAGE],
+    filters.UpdateType.CHANNEL_POST: [Update.CHANNEL_POST],
+    filters.UpdateType.EDITED_CHANNEL_POST: [Update.EDITED_CHANNEL_POST],
+    filters.UpdateType.CHANNEL_POSTS: [Update.CHANNEL_POST, Update.EDITED_CHANNEL_POST],
+}
+
+# Fallback for message-based handlers with other filters
+MESSAGE_UPDATE_TYPES = [
+    Update.MESSAGE,
+    Update.EDITED_MESSAGE,
+    Update.CHANNEL_POST,
+    Update.EDITED_CHANNEL_POST,
+]
+
+
+def handler_update_types(handler: Any) -> List[str]:
+    """Get the update types a handler can match"""
+    if isinstance(handler, (CommandHandler, MessageHandler)):
+        return FILTER_UPDATE_TYPES.get(handler.filters, MESSAGE_UPDATE_TYPES)
+    if isinstance(handler, ChatMemberHandler):
+        if handler.chat_member_types == ChatMemberHandler.MY_CHAT_MEMBER:
+            return [Update.MY_CHAT_MEMBER]
+        if handler.chat_member_types == ChatMemberHandler.CHAT_MEMBER:
+            return [Update.CHAT_MEMBER]
+        return [Update.MY_CHAT_MEMBER, Update.CHAT_MEMBER]
+    for handler_class, update_types in HANDLER_UPDATE_TYPES.items():
+        if isinstance(handler, handler_class):
+            return update_types
+    # Unknown handler, keep every update type
+    return list(Update.ALL_TYPES)
+
+
+def allowed_updates(application: Application) -> List[str]:
+    """Get the update types matched by the handlers registered on an application"""
+    types = set()
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            types.update(handler_update_types(handler))
+    return [str(update_type) for update_type in Update.ALL_TYPES if update_type in types]
+
+
+class UpdateFilter:
+    """Drop raw updates of types no handler matches, by top-level key"""
+
+    def __init__(self, allowed: Iterable[str]):
+        self._allowed = frozenset(str(update_type) for update_type in allowed)
+        self._accepted: Dict[str, int] = {}
+        self._dropped: Dict[str, int] = {}
+
+    @property
+    def allowed(self) -> List[str]:
+        """Allowed update types"""
+        return sorted(self._allowed)
+
+    def accept(self, data: Dict[str, Any]) -> bool:
+        """Check a raw update without building any objects"""
+        update_type = next((key for key in data if key != "update_id"), "unknown")
+        if update_type in self._allowed:
+            self._accepted[update_type] = self._accepted.get(update_type, 0) + 1
+            return True
+        self._dropped[update_type] = self._dropped.get(update_type, 0) + 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-type filter statistics"""
+        return {
+            "allowed": self.allowed,
+            "accepted": dict(self._accepted),
+            "dropped": dict(self._dropped),
+        }
@@ -0,0 +1,285 @@
+"""
+AIBET Core Value Index
+Market prices against model probabilities, kept sorted by edge as either side changes
+"""
+
+import math
+import time
+from bisect import bisect_left, insort
+from itertools import islice, takewhile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .scoring import ScoreBatch, ScoringEngine, scoring
+
+
+# Outcomes priced per match; the model probability of "away" is 1 - home score
+OUTCOMES = ("home", "away")
+
+# Above this share of changed probabilities, re-rank everything instead of entry by entry
+REBUILD_SHARE = 0.125
+
+# (match_id, market, outcome)
+SignalKey = Tuple[str, str, str]
+
+
+def edges(probabilities: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Expected return per unit staked at decimal `prices`"""
+    return probabilities * prices - 1.0
+
+
+class ValueIndex:
+    """Value signals in parallel arrays, with (-edge, slot) lists kept sorted for top-N reads
+
+    One ranked list covers every signal and one more per league, so a league filter never scans
+    other leagues. An odds update or a probability change re-ranks only its own entries; a new score batch that
+    moves many probabilities is applied as one vectorized pass.
+    """
+
+    def __init__(self, engine: ScoringEngine, capacity: int = 1024):
+        self._engine = engine
+        self._keys: List[SignalKey] = []
+        self._slots: Dict[SignalKey, int] = {}
+        self._by_match: Dict[str, List[int]] = {}
+        self._is_home = np.zeros(capacity, dtype=bool)
+        self._prices = np.zeros(capacity)
+        self._probabilities = np.full(capacity, np.nan)
+        self._edges = np.full(capacity, np.nan)
+        self._ranked: List[Tuple[float, int]] = []
+        self._leagues: List[str] = []
+        self._league_ranked: Dict[str, List[Tuple[float, int]]] = {}
+        self._score_version: Any = None
+        # Score batch row of each slot, valid for one feature extraction
+        self._match_rows = np.zeros(0, dtype=np.int64)
+        self._match_rows_of: Any = None
+
+        # Metrics
+        self._updates = 0
+        self._rebuilds = 0
+        self._rebuild_last = 0.0
+
+    def __len__(self) -> int:
+        return len(self._ranked)
+
+    def _slot(self, key: SignalKey) -> int:
+        """Slot of a signal, allocated on first sight"""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = len(self._keys)
+            self._keys.append(key)
+            self._leagues.append(key[0].partition(":")[0])
+            self._by_match.setdefault(key[0], []).append(slot)
+            if slot >= len(self._prices):
+                grow = len(self._prices)
+                self._is_home = np.concatenate([self._is_home, np.zeros(grow, dtype=bool)])
+                self._prices = np.concatenate([self._prices, np.zeros(grow)])
+                self._probabilities = np.concatenate([self._probabilities, np.full(grow, np.nan)])
+                self._edges = np.concatenate([self._edges, np.full(grow, np.nan)])
+            self._is_home[slot] = key[2] == "home"
+        return slot
+
+    def _reprice(self, slot: int) -> None:
+        """Recompute one edge and move its ranked entry: O(log n) search plus a list shift"""
+        league_ranked = self._league_ranked.setdefault(self._leagues[slot], [])
+        old = float(self._edges[slot])
+        if not math.isnan(old):
+            del self._ranked[bisect_left(self._ranked, (-old, slot))]
+            del league_ranked[bisect_left(league_ranked, (-old, slot))]
+        price = float(self._prices[slot])
+        edge = float(self._probabilities[slot]) * price - 1.0 if price > 0 else math.nan
+        self._edges[slot] = edge
+        if not math.isnan(edge):
+            insort(self._ranked, (-edge, slot))
+            insort(league_ranked, (-edge, slot))
+        self._updates += 1
+
+    @staticmethod
+    def _home_probability(batch: ScoreBatch, match_id: str) -> float:
+        """Model home win probability of a match, NaN if it is not scored"""
+        row = batch.features.rows.get(match_id)
+        return float(batch.score[row]) if row is not None else np.nan
+
+    def update_odds(self, match_id: str, market: str, prices: Dict[str, float]) -> None:
+        """Apply one odds snapshot of a market; only its outcomes are re-ranked"""
+        batch = self.sync()
+        home = self._home_probability(batch, match_id)
+        for outcome, price in prices.items():
+            if outcome not in OUTCOMES:
+                continue
+            slot = self._slot((match_id, market, outcome))
+            self._prices[slot] = price
+            self._probabilities[slot] = home if outcome == "home" else 1.0 - home
+            self._reprice(slot)
+
+    def remove(self, match_id: str) -> int:
+        """Drop every signal of a match, e.g. once it starts; slots are kept for reuse"""
+        removed = 0
+        for slot in self._by_match.get(match_id, ()):
+            if self._prices[slot] > 0:
+                self._prices[slot] = 0.0
+                self._reprice(slot)
+                removed += 1
+        return removed
+
+    def sync(self) -> ScoreBatch:
+        """Pick up a new score batch: re-rank only changed entries, or everything in one pass"""
+        batch = self._engine.refresh()
+        if batch.version == self._score_version:
+            return batch
+        self._score_version = batch.version
+        size = len(self._keys)
+        if not size:
+            return batch
+        if self._match_rows_of is not batch.features or len(self._match_rows) != size:
+            rows = batch.features.rows
+            self._match_rows = np.fromiter((rows.get(key[0], -1) for key in self._keys), dtype=np.int64, count=size)
+            self._match_rows_of = batch.features
+        match_rows = self._match_rows
+        if len(batch.score):
+            home = np.where(match_rows >= 0, batch.score[match_rows], np.nan)
+        else:
+            home = np.full(size, np.nan)
+        probabilities = np.where(self._is_home[:size], home, 1.0 - home)
+        current = self._probabilities[:size]
+        changed = np.flatnonzero(~((probabilities == current) | (np.isnan(probabilities) & np.isnan(current))))
+        if len(changed) > size * REBUILD_SHARE:
+            self._rebuild(probabilities)
+        else:
+            for slot in changed:
+                self._probabilities[slot] = probabilities[slot]
+                self._reprice(int(slot))
+        return batch
+
+    def _rebuild(self, probabilities: np.ndarray) -> None:
+        """Recompute every edge at once and re-sort"""
+        started = time.perf_counter()
+        size = len(probabilities)
+        self._probabilities[:size] = probabilities
+        prices = self._prices[:size]
+        edge = np.where(prices > 0, edges(probabilities, prices), np.nan)
+        self._edges[:size] = edge
+        live = np.flatnonzero(~np.isnan(edge))
+        order = live[np.lexsort((live, -edge[live]))]
+        self._ranked = list(zip((-edge[order]).tolist(), order.tolist()))
+        league_ranked: Dict[str, List[Tuple[float, int]]] = {}
+        leagues = self._leagues
+        for entry in self._ranked:
+            league_ranked.setdefault(leagues[entry[1]], []).append(entry)
+        self._league_ranked = league_ranked
+        self._rebuilds += 1
+        self._rebuild_last = time.perf_counter() - started
+
+    def top(self, limit: int = 20, min_edge: float = 0.0, league: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Best signals by edge, reading only as far as needed
+
+        Ranked lists are sorted by -edge, so the scan stops at the first entry below `min_edge`.
+        """
+        self.sync()
+        ranked = self._ranked if league is None else self._league_ranked.get(league, [])
+        entries = takewhile(lambda entry: entry[0] <= -min_edge, ranked)
+        return [self._signal(slot) for _, slot in islice(entries, limit)]
+
+    def _signal(self, slot: int) -> Dict[str, Any]:
+        """Signal fields of one slot"""
+        match_id, market, outcome = self._keys[slot]
+        return {
+            "match_id": match_id,
+            "league": self._leagues[slot],
+            "market": market,
+            "outcome": outcome,
+            "price": round(float(self._prices[slot]), 3),
+            "model_probability": round(float(self._probabilities[slot]), 4),
+            "edge": round(float(self._edges[slot]), 4),
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self._signal(slot) for _, slot in self._ranked)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get value index statistics"""
+        return {
+            "signals": len(self._ranked),
+            "slots": len(self._keys),
+            "updates": self._updates,
+            "rebuilds": self._rebuilds,
+            "rebuild_last_ms": round(self._rebuild_last * 1000, 3),
+        }
+
+
+# Global value index over the scoring engine
+value_index = ValueIndex(scoring)
+
+
+if __name__ == "__main__":
+    # Incremental odds updates and top-N reads vs recomputing every edge per request:
+    #   python -m core.value_index [matches]
+    import random
+    import sys
+
+    from .ingest import MatchRecord
+    from .match_index import MatchIndex
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    random.seed(19)
+    index = MatchIndex()
+    now = time.time()
+    names = [f"Team {i}" for i in range(200)]
+    index.replace_league("nhl", [MatchRecord(f"nhl:{i}", "nhl", *random.sample(names, 2), now + i * 600)
+                                 for i in range(count)])
+    engine = ScoringEngine(index)
+    for name in names:
+        engine.ratings.set(name, random.gauss(1500, 100), 30)
+    values = ValueIndex(engine)
+    for i in range(count):
+        values.update_odds(f"nhl:{i}", "moneyline", {"home": random.uniform(1.3, 3.5), "away": random.uniform(1.3, 3.5)})
+
+    def per_request() -> List[Tuple[float, SignalKey]]:
+        batch = engine.refresh()
+        ranked = []
+        for match_id, market, outcome in values._keys:
+            home = values._home_probability(batch, match_id)
+            p = home if outcome == "home" else 1 - home
+            ranked.append((p * values._prices[values._slots[(match_id, market, outcome)]] - 1, (match_id, market, outcome)))
+        ranked.sort(reverse=True)
+        return ranked[:20]
+
+    runs = 200
+    started = time.perf_counter()
+    for i in range(runs):
+        values.update_odds(f"nhl:{random.randrange(count)}", "moneyline", {"home": random.uniform(1.3, 3.5)})
+    update = (time.perf_counter() - started) / runs
+    started = time.perf_counter()
+    for _ in range(runs):
+        values.top(20)
+    top = (time.perf_counter() - started) / runs
+    started = time.perf_counter()
+    for _ in range(runs):
+        values.top(20, league="khl")
+    assert values.top(20, league="nhl") == values.top(20)
+    top_league = (time.perf_counter() - started) / runs
+    started = time.perf_counter()
+    for _ in range(5):
+        expected = per_request()
+    scan = (time.perf_counter() - started) / 5
+    engine.ratings.set(names[0], 1700, 30)
+    values.sync()
+    engine.ratings.set(names[2], 1600, 30)
+    started = time.perf_counter()
+    values.sync()
+    resync = time.perf_counter() - started
+    engine.ratings.set(names[1], 1300, 30)
+    for name in names[2:]:
+        engine.ratings.teams.set(name, random.gauss(1500, 100), 30)
+    engine.ratings.checkpoint()
+    started = time.perf_counter()
+    values.sync()
+    rebuild = time.perf_counter() - started
+    same = [s["edge"] for s in values.top(20)] == [round(e, 4) for e, _ in per_request()]
+    print(f"📊 {len(values)} signals over {count} matches, top 20 {'matches' if same else 'DIFFERS from'} a full scan")
+    print(f"  odds update (one outcome):       {update * 1e6:9.1f}us")
+    print(f"  top 20 read:                     {top * 1e6:9.1f}us")
+    print(f"  top 20 of an absent league:      {top_league * 1e6:9.1f}us")
+    print(f"  one team re-rated (incremental): {resync * 1000:9.2f}ms")
+    print(f"  all teams re-rated (vectorized): {rebuild * 1000:9.2f}ms")
+    print(f"  full recompute per request:      {scan * 1000:9.2f}ms")
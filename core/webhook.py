@@ -0,0 +1,158 @@
+"""
+AIBET Core Webhook Queue
+Bounded ack-first ingestion of Telegram webhook updates
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+UpdateHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class UpdateQueue:
+    """Bounded queue of raw updates drained by a pool of workers"""
+
+    def __init__(self, handler: UpdateHandler, maxsize: int = 1000, workers: int = 4):
+        self._handler = handler
+        self._maxsize = maxsize
+        self._workers_count = max(1, workers)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        # Metrics
+        self._enqueued = 0
+        self._rejected = 0
+        self._processed = 0
+        self._failed = 0
+        self._dequeued = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker pool is started"""
+        return bool(self._workers)
+
+    def start(self) -> None:
+        """Start the worker pool on the running event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self._maxsize)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"webhook-worker-{i}")
+            for i in range(self._workers_count)
+        ]
+        logger.info(f"✅ Webhook queue started: {self._workers_count} workers, maxsize {self._maxsize}")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Drain pending updates for up to `timeout` seconds, then stop workers"""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Webhook queue stopped with {self._queue.qsize()} pending updates")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, data: Dict[str, Any]) -> bool:
+        """Enqueue a raw update without waiting; False means the queue is full"""
+        if self._queue is None:
+            raise RuntimeError("Webhook queue is not started")
+        try:
+            self._queue.put_nowait((time.monotonic(), data))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            return False
+        self._enqueued += 1
+        return True
+
+    async def _worker(self, index: int) -> None:
+        """Process queued updates one at a time"""
+        while True:
+            item: Tuple[float, Dict[str, Any]] = await self._queue.get()
+            enqueued_at, data = item
+            wait = time.monotonic() - enqueued_at
+            self._dequeued += 1
+            self._wait_total += wait
+            self._wait_last = wait
+            if wait > self._wait_max:
+                self._wait_max = wait
+            try:
+                await self._handler(data)
+                self._processed += 1
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"❌ Webhook worker {index} failed on update_id {data.get('update_id', 'unknown')}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics"""
+        return {
+            "workers": len(self._workers),
+            "depth": self._queue.qsize() if self._queue else 0,
+            "maxsize": self._maxsize,
+            "enqueued": self._enqueued,
+            "rejected": self._rejected,
+            "processed": self._processed,
+            "failed": self._failed,
+            "wait_avg_ms": round(self._wait_total / self._dequeued * 1000, 3) if self._dequeued else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 3),
+            "wait_last_ms": round(self._wait_last * 1000, 3),
+        }
+
+
+class UpdateDeduplicator:
+    """Fixed-size window of recently seen update_ids (ring buffer plus set)"""
+
+    def __init__(self, capacity: int = 10000):
+        self._capacity = max(1, capacity)
+        self._order: Deque[int] = deque()
+        self._seen: Set[int] = set()
+        self._hits = 0
+        self._misses = 0
+
+    def seen(self, update_id: int) -> bool:
+        """Check whether an update_id is in the window"""
+        if update_id in self._seen:
+            self._hits += 1
+            return True
+        self._misses += 1
+        return False
+
+    def add(self, update_id: int) -> None:
+        """Add an id, evicting the oldest one when the window is full"""
+        if update_id in self._seen:
+            return
+        if len(self._order) >= self._capacity:
+            self._seen.discard(self._order.popleft())
+        self._order.append(update_id)
+        self._seen.add(update_id)
+
+    def snapshot(self) -> List[int]:
+        """Get the window, oldest first"""
+        return list(self._order)
+
+    def load(self, update_ids: Iterable[int]) -> None:
+        """Restore a window saved with snapshot()"""
+        for update_id in update_ids:
+            self.add(int(update_id))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get deduplication statistics"""
+        return {
+            "window": len(self._order),
+            "capacity": self._capacity,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
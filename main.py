@@ -12,9 +12,27 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from datetime import datetime
 from telegram import Update, Bot
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.ext import Application, CommandHandler, ContextTypes, filters
 import httpx
 
+from core.coalesce import ai_requests
+from core.config import config
+from core.context import context_builder
+from core.dispatcher import outbound
+from core.features import team_features
+from core.ingest import ingestion
+from core.models import model_registry
+from core.ratings import ratings
+from core.response_cache import response_cache
+from core.routes import router
+from core.schedule_cache import schedule_cache
+from core.scoring import scoring
+from core.simulation import simulator
+from core.storage import storage
+from core.templates import TemplateRegistry
+from core.updates import UpdateFilter, allowed_updates
+from core.webhook import UpdateQueue, UpdateDeduplicator
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -45,12 +63,25 @@ logger.info(f"🤖 Bot Token: {BOT_TOKEN[:10]}...")
 # Global variables
 bot_application = None
 telegram_bot = None
+update_queue = None
+update_filter = None
+update_dedup = UpdateDeduplicator(config.WEBHOOK_DEDUP_WINDOW)
+
+# Storage key for the recently seen update_id window
+DEDUP_STORAGE_KEY = "webhook:seen_update_ids"
+
+
+async def handle_update(data: dict) -> None:
+    """Build and process a queued Telegram update"""
+    update = Update.de_json(data, bot_application.bot)
+    await bot_application.process_update(update)
+    logger.info(f"📨 Webhook processed: update_id {data.get('update_id', 'unknown')}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global bot_application, telegram_bot
+    global bot_application, telegram_bot, update_queue, update_filter
     
     # Startup
     logger.info("🚀 Starting AIBET + AIBOT unified service...")
@@ -67,18 +98,41 @@ async def lifespan(app: FastAPI):
         bot_application = Application.builder().token(BOT_TOKEN).build()
         
         # Add command handlers
-        bot_application.add_handler(CommandHandler("start", start_command))
-        bot_application.add_handler(CommandHandler("help", help_command))
-        bot_application.add_handler(CommandHandler("status", status_command))
-        bot_application.add_handler(CommandHandler("about", about_command))
+        bot_application.add_handler(CommandHandler("start", start_command, filters=filters.UpdateType.MESSAGE))
+        bot_application.add_handler(CommandHandler("help", help_command, filters=filters.UpdateType.MESSAGE))
+        bot_application.add_handler(CommandHandler("status", status_command, filters=filters.UpdateType.MESSAGE))
+        bot_application.add_handler(CommandHandler("about", about_command, filters=filters.UpdateType.MESSAGE))
         
         # Initialize application
         await bot_application.initialize()
         
+        # Start storage write-behind
+        await storage.start()
+        
+        # Restore recently seen update_ids
+        update_dedup.load(storage.get(DEDUP_STORAGE_KEY, []))
+        
+        # Start webhook workers
+        update_queue = UpdateQueue(
+            handle_update,
+            maxsize=config.WEBHOOK_QUEUE_SIZE,
+            workers=config.WEBHOOK_WORKERS
+        )
+        update_queue.start()
+        
+        # Open the schedule ingestion connection pool
+        await ingestion.start()
+        
+        # Warm model weights in the background; /ready reports progress meanwhile
+        await model_registry.start()
+        
+        # Only subscribe to update types the handlers match
+        update_filter = UpdateFilter(allowed_updates(bot_application))
+        
         # Set webhook
         webhook_url = f"{RENDER_EXTERNAL_URL}/webhook"
-        await telegram_bot.set_webhook(webhook_url)
-        logger.info(f"✅ Webhook set: {webhook_url}")
+        await telegram_bot.set_webhook(webhook_url, allowed_updates=update_filter.allowed)
+        logger.info(f"✅ Webhook set: {webhook_url} ({', '.join(update_filter.allowed)})")
         
         logger.info("✅ Unified service ready!")
         
@@ -92,6 +146,15 @@ async def lifespan(app: FastAPI):
     logger.info("🔄 Shutting down unified service...")
     
     try:
+        if update_queue:
+            await update_queue.stop()
+        await outbound.stop()
+        await model_registry.stop()
+        await schedule_cache.stop()
+        await ingestion.stop()
+        simulator.stop()
+        storage.set(DEDUP_STORAGE_KEY, update_dedup.snapshot())
+        await storage.stop()
         if bot_application:
             await bot_application.shutdown()
         if telegram_bot:
@@ -120,6 +183,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Schedule and AI endpoints, shared by every entry point
+app.include_router(router)
+
 
 # Request logging middleware
 @app.middleware("http")
@@ -141,11 +207,8 @@ async def log_requests(request: Request, call_next):
         raise
 
 
-# Telegram Bot Command Handlers
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /start command"""
-    try:
-        welcome_message = f"""
+# Reply templates, rendered and Markdown-checked once at startup
+START_TEMPLATE = """
 🚀 **AIBOT - Educational Sports Analytics Bot**
 
 Welcome to the educational sports analytics assistant!
@@ -161,8 +224,8 @@ This bot provides educational sports analytics information only.
 No betting advice or predictions are provided.
 
 🌐 **AIBET Analytics Platform:**
-Web API: {RENDER_EXTERNAL_URL}
-Documentation: {RENDER_EXTERNAL_URL}/docs
+Web API: {render_url}
+Documentation: {render_url}/docs
 
 📈 **Features:**
 • NHL schedule and analytics
@@ -174,19 +237,8 @@ Documentation: {RENDER_EXTERNAL_URL}/docs
 Public sports APIs and official league websites
 Real-time educational analytics
 """
-        
-        await update.message.reply_text(welcome_message, parse_mode='Markdown')
-        logger.info(f"📤 Start command sent to user {update.effective_user.id}")
-        
-    except Exception as e:
-        logger.error(f"❌ Error in start_command: {e}")
-        await update.message.reply_text("❌ Service temporarily unavailable")
-
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /help command"""
-    try:
-        help_message = f"""
+HELP_TEMPLATE = """
 🤖 **AIBOT Help - Educational Analytics**
 
 📋 **Commands:**
@@ -212,33 +264,22 @@ No betting advice or financial recommendations.
 
 🌐 **Web Platform:**
 Visit our main platform at:
-{RENDER_EXTERNAL_URL}
+{render_url}
 
 📚 **Documentation:**
-API docs: {RENDER_EXTERNAL_URL}/docs
+API docs: {render_url}/docs
 
 ❓ **Support:**
 For technical issues, please check our web platform.
 """
-        
-        await update.message.reply_text(help_message, parse_mode='Markdown')
-        logger.info(f"📤 Help command sent to user {update.effective_user.id}")
-        
-    except Exception as e:
-        logger.error(f"❌ Error in help_command: {e}")
-        await update.message.reply_text("❌ Service temporarily unavailable")
-
 
-async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /status command"""
-    try:
-        status_message = f"""
+STATUS_TEMPLATE = """
 📊 **AIBOT Service Status**
 
 ✅ **Bot Status:** Online
-🕒 **Current Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC
+🕒 **Current Time:** {current_time} UTC
 🤖 **Bot Version:** 2.0.0
-🌐 **Service URL:** {RENDER_EXTERNAL_URL}
+🌐 **Service URL:** {render_url}
 
 🌐 **Connected Services:**
 • AIBET Analytics API: ✅ Online
@@ -254,21 +295,10 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 ⚠️ **Service Mode:** Educational Analytics Only
 🔒 **Compliance:** Educational Purpose Only
 
-🌐 **Web Platform:** {RENDER_EXTERNAL_URL}
+🌐 **Web Platform:** {render_url}
 """
-        
-        await update.message.reply_text(status_message, parse_mode='Markdown')
-        logger.info(f"📤 Status command sent to user {update.effective_user.id}")
-        
-    except Exception as e:
-        logger.error(f"❌ Error in status_command: {e}")
-        await update.message.reply_text("❌ Service temporarily unavailable")
-
 
-async def about_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle /about command"""
-    try:
-        about_message = f"""
+ABOUT_TEMPLATE = """
 🏆 **About AIBOT - Educational Sports Analytics**
 
 📖 **Mission:**
@@ -297,7 +327,7 @@ No betting advice, financial recommendations, or predictions.
 Sports analytics involves inherent uncertainties.
 
 🌐 **Platform Integration:**
-• Web API: {RENDER_EXTERNAL_URL}
+• Web API: {render_url}
 • Documentation: /docs endpoint
 • Health Monitoring: /api/health endpoint
 
@@ -317,13 +347,68 @@ Educational sports analytics for:
 📈 **Version:** 2.0.0
 🕒 **Last Updated:** 2026-02-06
 """
+
+templates = TemplateRegistry()
+templates.register("start", START_TEMPLATE, render_url=RENDER_EXTERNAL_URL)
+templates.register("help", HELP_TEMPLATE, render_url=RENDER_EXTERNAL_URL)
+templates.register("status", STATUS_TEMPLATE, render_url=RENDER_EXTERNAL_URL)
+templates.register("about", ABOUT_TEMPLATE, render_url=RENDER_EXTERNAL_URL)
+
+
+# Telegram Bot Command Handlers
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /start command"""
+    try:
+        welcome_message = templates.render("start")
+        
+        await outbound.reply_text(update.message, welcome_message, parse_mode='Markdown')
+        logger.info(f"📤 Start command sent to user {update.effective_user.id}")
+        
+    except Exception as e:
+        logger.error(f"❌ Error in start_command: {e}")
+        await outbound.reply_text(update.message, "❌ Service temporarily unavailable")
+
+
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /help command"""
+    try:
+        help_message = templates.render("help")
+        
+        await outbound.reply_text(update.message, help_message, parse_mode='Markdown')
+        logger.info(f"📤 Help command sent to user {update.effective_user.id}")
         
-        await update.message.reply_text(about_message, parse_mode='Markdown')
+    except Exception as e:
+        logger.error(f"❌ Error in help_command: {e}")
+        await outbound.reply_text(update.message, "❌ Service temporarily unavailable")
+
+
+async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /status command"""
+    try:
+        status_message = templates.render(
+            "status",
+            current_time=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        )
+        
+        await outbound.reply_text(update.message, status_message, parse_mode='Markdown')
+        logger.info(f"📤 Status command sent to user {update.effective_user.id}")
+        
+    except Exception as e:
+        logger.error(f"❌ Error in status_command: {e}")
+        await outbound.reply_text(update.message, "❌ Service temporarily unavailable")
+
+
+async def about_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /about command"""
+    try:
+        about_message = templates.render("about")
+        
+        await outbound.reply_text(update.message, about_message, parse_mode='Markdown')
         logger.info(f"📤 About command sent to user {update.effective_user.id}")
         
     except Exception as e:
         logger.error(f"❌ Error in about_command: {e}")
-        await update.message.reply_text("❌ Service temporarily unavailable")
+        await outbound.reply_text(update.message, "❌ Service temporarily unavailable")
 
 
 # API Endpoints
@@ -372,24 +457,47 @@ async def health():
         )
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness check: 503 while model weights are still warming, without waiting on them"""
+    status = model_registry.status()
+    return JSONResponse(
+        status_code=200 if status["ready"] else 503,
+        content={**status, "timestamp": datetime.utcnow().isoformat()}
+    )
+
+
 @app.post("/webhook")
 async def telegram_webhook(request: Request):
     """Telegram webhook endpoint"""
     try:
-        if not bot_application:
+        if not bot_application or not update_queue or not update_filter:
             logger.error("❌ Bot application not initialized")
             raise HTTPException(status_code=500, detail="Bot not initialized")
         
         # Get update from Telegram
         data = await request.json()
         
-        # Create Update object
-        update = Update.de_json(data, bot_application.bot)
+        # Drop update types no handler matches
+        if not update_filter.accept(data):
+            return JSONResponse(status_code=200, content={"status": "ignored"})
         
-        # Process update
-        await bot_application.process_update(update)
+        # Drop Telegram redeliveries
+        update_id = data.get("update_id")
+        if update_id is not None and update_dedup.seen(update_id):
+            logger.info(f"🔁 Duplicate update_id {update_id} dropped")
+            return JSONResponse(status_code=200, content={"status": "duplicate"})
         
-        logger.info(f"📨 Webhook processed: update_id {data.get('update_id', 'unknown')}")
+        # Acknowledge at once, workers process the update
+        if not update_queue.submit(data):
+            logger.warning(f"⚠️ Webhook queue full, rejecting update_id {data.get('update_id', 'unknown')}")
+            return JSONResponse(
+                status_code=503,
+                content={"status": "busy"},
+                headers={"Retry-After": str(config.WEBHOOK_RETRY_AFTER)}
+            )
+        if update_id is not None:
+            update_dedup.add(update_id)
         
         return JSONResponse(status_code=200, content={"status": "ok"})
         
@@ -401,6 +509,28 @@ async def telegram_webhook(request: Request):
         )
 
 
+@app.get("/metrics")
+async def metrics():
+    """Internal service metrics"""
+    return {
+        "webhook_queue": update_queue.get_stats() if update_queue else None,
+        "webhook_dedup": update_dedup.get_stats(),
+        "webhook_filter": update_filter.get_stats() if update_filter else None,
+        "outbound": outbound.get_stats(),
+        "ingestion": ingestion.get_stats(),
+        "schedule_cache": schedule_cache.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "scoring": scoring.get_stats(),
+        "ratings": ratings.get_stats(),
+        "features": team_features.get_stats(),
+        "simulation": simulator.get_stats(),
+        "context": context_builder.get_stats(),
+        "models": model_registry.get_stats(),
+        "coalescing": ai_requests.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -410,80 +540,15 @@ async def root():
         "status": "running",
         "docs": "/docs",
         "health": "/health",
+        "ready": "/ready",
         "api_health": "/api/health",
         "webhook": "/webhook",
+        "metrics": "/metrics",
         "render_url": RENDER_EXTERNAL_URL,
         "bot_status": "online" if telegram_bot else "offline"
     }
 
 
-@app.get("/v1/nhl/schedule")
-async def get_nhl_schedule():
-    """Get NHL schedule - educational version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "NHL schedule service - educational analytics only",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/khl/schedule")
-async def get_khl_schedule():
-    """Get KHL schedule - educational version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "KHL schedule service - educational analytics only",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/cs2/upcoming")
-async def get_cs2_upcoming():
-    """Get CS2 upcoming matches - educational version"""
-    return {
-        "success": True,
-        "data": [],
-        "message": "CS2 upcoming matches service - educational analytics only",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/ai/context/{match_id}")
-async def get_ai_context(match_id: str):
-    """Get AI context - educational version"""
-    return {
-        "success": True,
-        "data": {
-            "match_id": match_id,
-            "context": "Educational analysis only",
-            "not_a_prediction": True,
-            "educational_purpose": True,
-            "message": "AI context service - educational analysis only"
-        },
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
-@app.get("/v1/ai/score/{match_id}")
-async def get_ai_score(match_id: str):
-    """Get AI score - educational version"""
-    return {
-        "success": True,
-        "data": {
-            "match_id": match_id,
-            "ai_score": 0.5,
-            "confidence": 0.5,
-            "risk_level": "medium",
-            "not_a_prediction": True,
-            "educational_purpose": True,
-            "message": "AI scoring service - educational analysis only"
-        },
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-
 if __name__ == "__main__":
     import uvicorn
     
@@ -4,6 +4,8 @@ Timeweb deployment ready
 """
 
 import asyncio
+import signal
+import subprocess
 import sys
 from datetime import datetime
 
@@ -38,25 +40,110 @@ async def run_bot():
     return True
 
 
+def create_api_server():
+    """Build a uvicorn server that runs on the caller's event loop"""
+    import uvicorn
+    from api.main import app
+    
+    return uvicorn.Server(uvicorn.Config(app, host=config.API_HOST, port=config.API_PORT))
+
+
 async def run_api():
-    """Run FastAPI API"""
+    """Run FastAPI API; with DEBUG, under uvicorn's reloader as a standalone process"""
     try:
         print("🌐 Запуск FastAPI...")
-        import uvicorn
-        from api.main import app
-        
-        uvicorn.run(
-            "api.main:app",
-            host=config.API_HOST,
-            port=config.API_PORT,
-            reload=config.DEBUG
-        )
+        if config.DEBUG:
+            # The reloader restarts the app in child processes, so it cannot share a loop with the bot
+            import uvicorn
+            uvicorn.run("api.main:app", host=config.API_HOST, port=config.API_PORT, reload=True)
+        else:
+            await create_api_server().serve()
     except Exception as e:
         print(f"❌ Ошибка запуска API: {e}")
         return False
     return True
 
 
+def get_rss_mb() -> float:
+    """Resident memory of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # Peak rather than current RSS; ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+async def run_both():
+    """Run bot polling and the API as tasks on one event loop"""
+    try:
+        print("🚀 Запуск бота и FastAPI в одном процессе...")
+        from bot.bot import bot
+        
+        server = create_api_server()
+        # One handler below stops both services; uvicorn must not install its own
+        server.install_signal_handlers = lambda: None
+        
+        def signal_handler(signum):
+            print(f"\n🔄 Получен сигнал {signum}, завершение работы...")
+            server.should_exit = True
+            bot.stop()
+        
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, signal_handler, signum)
+        
+        api_task = asyncio.create_task(server.serve(), name="api")
+        bot_task = asyncio.create_task(bot.run(handle_signals=False), name="bot")
+        print(f"📦 RSS процесса: {get_rss_mb():.1f} MB (python run.py memory — сравнение с двумя процессами)")
+        
+        # If either service exits on its own, take the other one down too
+        done, _ = await asyncio.wait({api_task, bot_task}, return_when=asyncio.FIRST_COMPLETED)
+        server.should_exit = True
+        bot.stop()
+        results = await asyncio.gather(api_task, bot_task, return_exceptions=True)
+        for name, result in zip(("API", "бот"), results):
+            if isinstance(result, BaseException):
+                print(f"❌ Ошибка ({name}): {result}")
+                return False
+    except Exception as e:
+        print(f"❌ Ошибка запуска: {e}")
+        return False
+    return True
+
+
+# Imports for each mode; measured in fresh interpreters by report_memory()
+MEMORY_PROBES = {
+    "bot": "import bot.bot",
+    "api": "import run; run.create_api_server()",
+    "both": "import bot.bot; import run; run.create_api_server()",
+}
+
+
+def report_memory() -> bool:
+    """Compare RSS of the bot and API stacks loaded separately and together"""
+    rss = {}
+    for mode, probe in MEMORY_PROBES.items():
+        result = subprocess.run(
+            [sys.executable, "-c", f"{probe}; import run; print(run.get_rss_mb())"],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"❌ Не удалось измерить режим {mode}: {result.stderr.strip().splitlines()[-1:]}")
+            return False
+        rss[mode] = float(result.stdout.strip().splitlines()[-1])
+        print(f"  {mode:<5} {rss[mode]:>8.1f} MB")
+    separate = rss["bot"] + rss["api"]
+    print(f"📦 Два процесса: {separate:.1f} MB, один процесс: {rss['both']:.1f} MB, "
+          f"экономия {separate - rss['both']:.1f} MB")
+    return True
+
+
 async def main():
     """Main entry point"""
     print_banner()
@@ -68,7 +155,8 @@ async def main():
         print("📋 Доступные режимы:")
         print("1. 🤖 Telegram Bot (рекомендуется)")
         print("2. 🌐 FastAPI API")
-        print("3. 🚀 Оба сервиса")
+        print("3. 🚀 Оба сервиса (один процесс)")
+        print("4. 📦 Замер памяти (memory)")
         print()
         
         # Check command line arguments
@@ -86,12 +174,12 @@ async def main():
         elif mode == "api":
             success = await run_api()
         elif mode == "both":
-            print("⚠️ Режим 'both' временно отключен для стабильности")
-            print("🤖 Запуск только Telegram бота...")
-            success = await run_bot()
+            success = await run_both()
+        elif mode == "memory":
+            success = report_memory()
         else:
             print(f"❌ Неизвестный режим: {mode}")
-            print("Доступные режимы: bot, api, both")
+            print("Доступные режимы: bot, api, both, memory")
             success = False
         
         if success: